@@ -1,23 +1,35 @@
+import tempfile
+
 import xlsxwriter
 from django.contrib import admin
+from django.contrib.admin import helpers
 from django.contrib.auth.admin import UserAdmin
+from django.shortcuts import render
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from django_otp.admin import OTPAdminSite
 from rangefilter.filters import DateRangeQuickSelectListFilterBuilder
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.platypus import SimpleDocTemplate
 from django.urls import reverse
-from django.http import HttpResponse
-from django.utils.timezone import localtime
+from django.http import FileResponse, HttpResponse
 from datetime import datetime
 from .models import CustomUser
 from .models import Mahsulot, MahsulotBalans, MahsulotBalansTarix, KirdiChiqdi, KirdiChiqdiForm, OlchovBirligi
+from .models import ImportVazifa, KunlikBalans, MahsulotBalansTarixArxiv, OylikBalans, band_bolsa_qaytarish
+from .models import HarakatKuni
+from .forms import OylikHisobotForm
+from .eksport import PDF_QATOR_BALANDLIGI, OqimliFlowablelar, eksport_qatorlari, eksport_ustunlari
+from .eksport import pdf_jadvallari, pdf_ustun_kengliklari
+from .replika import ReplikaAdminMixin, replikadan_amal
+from .sahifalash import KALIT_TARTIBI, KalitliSahifalashMixin
 
 admin.site.__class__ = OTPAdminSite
 
+OYLAR = ["yanvar", "fevral", "mart", "aprel", "may", "iyun",
+         "iyul", "avgust", "sentabr", "oktabr", "noyabr", "dekabr"]
+
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -41,10 +53,40 @@ class CustomUserAdmin(UserAdmin):
     profile_image_preview.short_description = 'Profile Image'
 
 
+@replikadan_amal
 def oylik_hisobot(modeladmin, request, queryset):
+    """
+    Tanlangan yozuvlardagi mahsulotlar bo'yicha oylik chiqim hisoboti.
+
+    Avval oy so'raladigan oraliq sahifa ko'rsatiladi, so'ng hisobot
+    `KirdiChiqdi.objects.oylik_chiqim` (bitta GROUP BY so'rovi) asosida yoziladi.
+    """
+    form = OylikHisobotForm(request.POST if "apply" in request.POST else None,
+                            initial={"oy": timezone.localdate().replace(day=1)})
+    if not form.is_valid():
+        return render(request, "admin/oylik_hisobot.html", {
+            **modeladmin.admin_site.each_context(request),
+            "title": "Oylik hisobot",
+            "form": form,
+            "opts": modeladmin.model._meta,
+            "action": "oylik_hisobot",
+            "tanlanganlar": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            "select_across": request.POST.get("select_across", "0"),
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+        })
+
+    oy = form.cleaned_data["oy"]
+    summa_bilan = form.cleaned_data["summa_bilan"]
+    boshi = timezone.make_aware(datetime(oy.year, oy.month, 1))
+    oxiri = timezone.make_aware(datetime(oy.year + oy.month // 12, oy.month % 12 + 1, 1))
+    # Tanlangan yozuvlar subquery sifatida uzatiladi, hisobot baribir bitta so'rov
+    natijalar = KirdiChiqdi.objects.oylik_chiqim(boshi, oxiri, queryset.values('mahsulot_nomi'))
+
     model_name = modeladmin.model.__name__
     response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename=Oylik_hisobot_{model_name}.xlsx'
+    response['Content-Disposition'] = (
+        f'attachment; filename=Oylik_hisobot_{model_name}_{oy.year}_{oy.month:02d}.xlsx'
+    )
 
     workbook = xlsxwriter.Workbook(response, {'in_memory': True})
     worksheet = workbook.add_worksheet("Hisobot")
@@ -54,21 +96,21 @@ def oylik_hisobot(modeladmin, request, queryset):
         {'bold': True, 'bg_color': '#D3D3D3', 'border': 1, 'align': 'center', 'valign': 'vcenter'})
     text_format = workbook.add_format({'border': 1, 'align': 'left', 'valign': 'vcenter'})
     number_format = workbook.add_format({'border': 1, 'align': 'center', 'valign': 'vcenter'})
+    money_format = workbook.add_format({'border': 1, 'align': 'right', 'valign': 'vcenter', 'num_format': '#,##0.00'})
     bold_center_format = workbook.add_format({'bold': True, 'align': 'center', 'valign': 'vcenter'})
 
-    # Get current month and year
-    now = datetime.now()
-    current_year = now.year
-    current_month = now.strftime('%B')  # Oyni matn ko'rinishida olish (masalan, "Dekabr")
+    headers = ["T/R", "Berilgan mahsulotlar nomi", "O‘lchov birligi", "Miqdori"]
+    if summa_bilan:
+        headers.append("Summa")
+    oxirgi_ustun = chr(ord('A') + len(headers) - 1)
 
     # Write the title
-    worksheet.merge_range('A1:D1',
-                          f'TATU Farg‘ona filiali omboridan {current_year} yil {current_month.lower()} oyida berilgan mahsulotlar haqida',
+    worksheet.merge_range(f'A1:{oxirgi_ustun}1',
+                          f'TATU Farg‘ona filiali omboridan {oy.year} yil {OYLAR[oy.month - 1]} oyida berilgan mahsulotlar haqida',
                           bold_center_format)
-    worksheet.merge_range('A2:D2', 'M A L U M O T', bold_center_format)
+    worksheet.merge_range(f'A2:{oxirgi_ustun}2', 'M A L U M O T', bold_center_format)
 
     # Write headers
-    headers = ["T/R", "Berilgan mahsulotlar nomi", "O‘lchov birligi", "Miqdori"]
     for col_num, header in enumerate(headers):
         worksheet.write(3, col_num, header, header_format)
 
@@ -77,33 +119,16 @@ def oylik_hisobot(modeladmin, request, queryset):
     worksheet.set_column(1, 1, 40)  # Mahsulot nomi
     worksheet.set_column(2, 2, 15)  # O‘lchov birligi
     worksheet.set_column(3, 3, 10)  # Miqdori
+    worksheet.set_column(4, 4, 18)  # Summa
 
     # Write data rows
-    for row_num, obj in enumerate(queryset, start=4):
+    for row_num, natija in enumerate(natijalar, start=4):
         worksheet.write(row_num, 0, row_num - 3, text_format)  # T/R
-
-        # Mahsulot nomini olish
-        mahsulot_nomi = getattr(obj, 'mahsulot_nomi', None)
-        if mahsulot_nomi:
-            mahsulot_nomi = str(mahsulot_nomi)  # Mahsulot nomini to'g'ri formatlash
-        else:
-            mahsulot_nomi = 'Noma’lum'
-
-        worksheet.write(row_num, 1, mahsulot_nomi, text_format)  # Mahsulot nomi
-
-        # O‘lchov birligini olish
-        olchov_birligi = getattr(obj, 'get_olchov_birligi', None)
-        if olchov_birligi:
-            olchov_birligi_value = getattr(olchov_birligi, 'olchov_birligi',
-                                           'Noma’lum')  # Ensure we access the correct field
-        else:
-            olchov_birligi_value = 'Noma’lum'
-
-        worksheet.write(row_num, 2, olchov_birligi_value, text_format)  # O‘lchov birligi
-
-        # Miqdorini olish
-        miqdor = getattr(obj, 'miqdor', 'Noma’lum')
-        worksheet.write(row_num, 3, miqdor, number_format)  # Miqdori
+        worksheet.write(row_num, 1, natija['mahsulot_nomi__mahsulot_nomi'], text_format)  # Mahsulot nomi
+        worksheet.write(row_num, 2, natija['mahsulot_nomi__olchov_birligi__olchov_birligi'], text_format)
+        worksheet.write(row_num, 3, natija['jami_miqdor'], number_format)  # Miqdori
+        if summa_bilan:
+            worksheet.write(row_num, 4, natija['jami_summa'], money_format)  # Summa
 
     workbook.close()
     return response
@@ -112,108 +137,82 @@ def oylik_hisobot(modeladmin, request, queryset):
 oylik_hisobot.short_description = "Oylik hisobotni Excel faylida yuklab olish"
 
 
+@replikadan_amal
 def download_excel(modeladmin, request, queryset):
     model_name = modeladmin.model.__name__
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename={model_name}.xlsx'
-    workbook = xlsxwriter.Workbook(response, {'in_memory': True})
+    ustunlar = eksport_ustunlari(modeladmin.model)
+
+    # Fayl vaqtinchalik diskda yig'iladi: constant_memory rejimida har bir qator yozilgach xotiradan chiqadi
+    fayl = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(fayl, {'constant_memory': True})
     worksheet = workbook.add_worksheet()
 
     # Define formats
     header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3', 'border': 1})
     kirdi_format = workbook.add_format({'font_color': 'green', 'bold': True})
     chiqdi_format = workbook.add_format({'font_color': 'red', 'bold': True})
-    sana_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss', 'border': 1})  # Date format
+    amaliyot_formatlari = {"Kirdi": kirdi_format, "Chiqdi": chiqdi_format}
 
     # Write headers
-    headers = ["T/r"] + [field.verbose_name for field in modeladmin.model._meta.fields]
+    headers = ["T/r"] + [sarlavha for sarlavha, _ in ustunlar]
     for col_num, header in enumerate(headers):
         worksheet.write(0, col_num, header, header_format)
 
-    # Auto-adjust column widths
-    for col_num, field in enumerate(headers):
-        if field == "T/r":
-            max_len = 5  # "T/r" uchun qo'lda kenglikni belgilang
-        else:
-            max_len = max(
-                [len(str(getattr(obj, field))) for obj in queryset if hasattr(obj, field)] + [len(field)]
-            )
-        worksheet.set_column(col_num, col_num, max_len + 2)
+    # Ustun kengliklari ma'lumotlar bilan bir o'tishda hisoblanadi
+    kengliklar = [5] + [len(header) for header in headers[1:]]  # "T/r" uchun qo'lda kenglik
+    yollar = [yol for _, yol in ustunlar]
+    amaliyot_ustuni = yollar.index("amaliyot_turi") + 1 if "amaliyot_turi" in yollar else None
 
     # Write data rows
-    for row_num, obj in enumerate(queryset, 1):
+    for row_num, qator in enumerate(eksport_qatorlari(queryset, yollar), 1):
         worksheet.write(row_num, 0, row_num)
-        for col_num, field in enumerate(modeladmin.model._meta.fields, 1):
-            value = str(getattr(obj, field.name))
-
-            # Vaqtni formatlash
-            if isinstance(getattr(obj, field.name), datetime):
-                value = localtime(getattr(obj, field.name)).strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                getattr(obj, field.name)
-
+        for col_num, value in enumerate(qator, 1):
+            value = str(value)
+            kengliklar[col_num] = max(kengliklar[col_num], len(value))
             # Amaliyot turiga rang kiritish
-            if field.name == "amaliyot_turi":
-                if value == "Kirdi":
-                    worksheet.write(row_num, col_num, value, kirdi_format)
-                elif value == "Chiqdi":
-                    worksheet.write(row_num, col_num, value, chiqdi_format)
-                else:
-                    worksheet.write(row_num, col_num, value)
+            if col_num == amaliyot_ustuni:
+                worksheet.write(row_num, col_num, value, amaliyot_formatlari.get(value))
             else:
                 worksheet.write(row_num, col_num, value)
 
+    for col_num, kenglik in enumerate(kengliklar):
+        worksheet.set_column(col_num, col_num, kenglik + 2)
+
     workbook.close()
-    return response
+    fayl.seek(0)
+    return FileResponse(
+        fayl, as_attachment=True, filename=f'{model_name}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
 
 
 download_excel.short_description = "Tanlangan maydonlarni Excel fayl sifatida yuklab olish"
 
 
-def download_pdf(self, request, queryset):
-    model_name = self.model.__name__
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename={model_name}.pdf'
-
-    pdf = canvas.Canvas(response, pagesize=letter)
-    pdf.setTitle('PDF Report')
-
-    ordered_queryset = queryset.order_by('-id')
-
-    headers = ["T/r"] + [field.verbose_name for field in self.model._meta.fields]
-    data = [headers]
-
-    for index, obj in enumerate(ordered_queryset, 1):
-        data_row = [index]
-        data_row += [localtime(getattr(obj, field.name)).strftime('%Y-%m-%d %H:%M:%S')
-                     if isinstance(getattr(obj, field.name), datetime) else getattr(obj, field.name)
-                     for field in self.model._meta.fields]
-        data.append(data_row)
-
-    table = Table(data)
-    style = TableStyle(
-        [
-            ('BACKGROUND', (0, 0), (-1, 0), colors.gray),  # Header background
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),  # Table grid
-        ]
+@replikadan_amal
+def download_pdf(modeladmin, request, queryset):
+    model_name = modeladmin.model.__name__
+    ustunlar = eksport_ustunlari(modeladmin.model)
+    yollar = [yol for _, yol in ustunlar]
+    amaliyot_ustuni = yollar.index("amaliyot_turi") + 1 if "amaliyot_turi" in yollar else None
+
+    fayl = tempfile.TemporaryFile()
+    doc = SimpleDocTemplate(fayl, pagesize=landscape(A4), title=f'{model_name} hisoboti', pageCompression=1,
+                            leftMargin=20, rightMargin=20, topMargin=20, bottomMargin=20)
+    # Frame ichki chegaralari (6pt) va sarlavha qatori hisobga olinadi
+    sahifadagi_qatorlar = int((doc.height - 12) // PDF_QATOR_BALANDLIGI) - 1
+
+    headers = ["T/r"] + [str(sarlavha) for sarlavha, _ in ustunlar]
+    qatorlar = (
+        [row_num] + [str(value) for value in qator]
+        for row_num, qator in enumerate(eksport_qatorlari(queryset, yollar), 1)
     )
+    jadvallar = pdf_jadvallari(headers, qatorlar, sahifadagi_qatorlar,
+                               pdf_ustun_kengliklari(modeladmin.model, doc.width - 12), amaliyot_ustuni)
+    doc.build(OqimliFlowablelar(jadvallar))
 
-    # Add color formatting for "Kirdi" and "Chiqdi"
-    for row_num, row_data in enumerate(data[1:], start=1):  # Skip header
-        if "Kirdi" in row_data:
-            style.add('TEXTCOLOR', (row_data.index("Kirdi"), row_num), (row_data.index("Kirdi"), row_num), colors.green)
-        elif "Chiqdi" in row_data:
-            style.add('TEXTCOLOR', (row_data.index("Chiqdi"), row_num), (row_data.index("Chiqdi"), row_num), colors.red)
-
-    table.setStyle(style)
-
-    canvas_width = 550
-    canvas_height = 750
-    table.wrapOn(pdf, canvas_width, canvas_height)
-    table.drawOn(pdf, 20, canvas_height - (len(data) * 20))  # Adjust placement
-
-    pdf.save()
-    return response
+    fayl.seek(0)
+    return FileResponse(fayl, as_attachment=True, filename=f'{model_name}.pdf', content_type='application/pdf')
 
 
 download_pdf.short_description = 'Tanlangan maydonlarni PDF fayl sifatda yuklash'
@@ -239,13 +238,8 @@ class OlchovBirligiFilter(admin.SimpleListFilter):
         """
         Filterda faqat `KirdiChiqdi` modelida mavjud o'lchov birliklari ko'rinadi.
         """
-        # KirdiChiqdi modelida ishlatilgan o'lchov birliklarini oling
-        olchov_birliklar = (
-            KirdiChiqdi.objects.values_list('mahsulot_nomi__olchov_birligi__id',
-                                            'mahsulot_nomi__olchov_birligi__olchov_birligi')
-            .distinct()
-        )
-        return [(ob[0], ob[1]) for ob in olchov_birliklar]
+        # KirdiChiqdi modelida ishlatilgan o'lchov birliklari (keshdan)
+        return KirdiChiqdi.objects.ishlatilgan_olchov_birliklari()
 
     def queryset(self, request, queryset):
         """
@@ -261,6 +255,7 @@ class OlchovBirligiFilter(admin.SimpleListFilter):
 @admin.register(Mahsulot)
 class MahsulotAdmin(admin.ModelAdmin):
     list_display = ('id', 'mahsulot_nomi', 'olchov_birligi')  # Admin panelda ko'rsatish uchun maydonlar
+    list_select_related = ('olchov_birligi',)
     list_display_links = ('id', 'mahsulot_nomi')  # Ushbu maydonlarga bosilsa, tegishli mahsulotga o'tadi
     search_fields = ('mahsulot_nomi',)  # Mahsulot nomi bo'yicha qidiruv imkoniyati
     ordering = ('-id',)  # Mahsulotlarni id bo'yicha tartibda ko'rsatish
@@ -270,16 +265,24 @@ class MahsulotAdmin(admin.ModelAdmin):
 # === MahsulotBalans Admin ===
 # Bu bo'lim mahsulot balansi (ombordagi miqdor)ni boshqarish uchun.
 @admin.register(MahsulotBalans)
-class MahsulotBalansAdmin(admin.ModelAdmin):
+class MahsulotBalansAdmin(ReplikaAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'mahsulot_nomi', 'get_olchov_birligi', 'qoldiq')  # Ko'rinadigan ustunlar
     list_display_links = ('id', 'mahsulot_nomi')  # Mahsulotga bosilganda uning balansi ko'rsatiladi
     search_fields = ('mahsulot_nomi__mahsulot_nomi',)  # Mahsulot nomi bo'yicha qidiruv
     list_filter = (OlchovBirligiFilter,)  # Custom filterni qo'shish
+    list_select_related = ('mahsulot_nomi__olchov_birligi',)  # get_olchov_birligi uchun JOIN
     ordering = ('-id',)  # ID bo'yicha tartib
     list_per_page = 20  # Bir sahifada ko'rsatilgan elementlar soni
     actions = [oylik_hisobot,download_excel,
                download_pdf]  # Mahsulotning joriy balansi haqida malumot olish uchun fayl sifatida yuklab olish xizmati
 
+    change_list_template = "admin/mahsulot_balans_changelist.html"
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context['qoldiq_varaqasi_url'] = reverse('qoldiq_varaqasi')
+        return super().changelist_view(request, extra_context=extra_context)
+
     def get_olchov_birligi(self, obj):
         """Displays the 'olchov_birligi' of the related 'Mahsulot'."""
         return obj.mahsulot_nomi.olchov_birligi if obj.mahsulot_nomi else None
@@ -290,7 +293,7 @@ class MahsulotBalansAdmin(admin.ModelAdmin):
         if db_field.name == "mahsulot_nomi__olchov_birligi":
             # Faqat `KirdiChiqdi` orqali kiritilgan `OlchovBirligi`larni ko'rsatish
             kwargs["queryset"] = OlchovBirligi.objects.filter(
-                id__in=KirdiChiqdi.objects.values('mahsulot_nomi__olchov_birligi'))
+                id__in=[birlik_id for birlik_id, _ in KirdiChiqdi.objects.ishlatilgan_olchov_birliklari()])
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
     # Foydalanuvchining o'zi mahsulot uchun balance ni o'zgartira olmasligi zarur
@@ -298,20 +301,36 @@ class MahsulotBalansAdmin(admin.ModelAdmin):
         return False  # Mahsulot balansi qo'shish huquqi yo'q
 
 
+# === Harakat kunlari ===
+# `date_hierarchy` navigatsiyasi `HarakatKuni` dan quriladi: o'chirilgan yozuvlar kunida
+# boshqa yozuv qolmasa, kun navigatsiyadan olib tashlanadi.
+class HarakatKunlariAdminMixin:
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        HarakatKuni.objects.kunlarni_tozalash(self.model, [timezone.localdate(obj.sana)])
+
+    def delete_queryset(self, request, queryset):
+        kunlar = list(queryset.dates('sana', 'day'))
+        super().delete_queryset(request, queryset)
+        HarakatKuni.objects.kunlarni_tozalash(self.model, kunlar)
+
+
 # === MahsulotBalansTarix Admin ===
 # Bu bo'lim mahsulot balansi tarixini boshqarish uchun.
 @admin.register(MahsulotBalansTarix)
-class MahsulotBalansTarixAdmin(admin.ModelAdmin):
+class MahsulotBalansTarixAdmin(ReplikaAdminMixin, HarakatKunlariAdminMixin, KalitliSahifalashMixin, admin.ModelAdmin):
     list_display = (
         'id', 'mahsulot_nomi', 'miqdor', 'get_olchov_birligi', 'qoldiq', 'sana',
         'colored_amaliyot_turi', 'kimga', 'qayerga')  # Ko'rinadigan ustunlar
     # search_fields = ("mahsulot_nomi__mahsulot_nomi",)
     list_filter = (("sana", DateRangeQuickSelectListFilterBuilder()),)
-    date_hierarchy = 'sana'  # Sanalar bo'yicha navigatsiya
-    ordering = ('-id',)  # Teskari tartibda ko'rsatish
+    list_select_related = ('mahsulot_nomi__olchov_birligi',)  # get_olchov_birligi uchun JOIN
+    date_hierarchy = 'sana'  # Sanalar bo'yicha navigatsiya (HarakatKuni jadvalidan)
+    ordering = KALIT_TARTIBI  # Teskari tartibda ko'rsatish (kalitli sahifalash uchun)
     list_per_page = 20  # Bir sahifada ko'rsatilgan elementlar soni
     actions = [download_excel, download_pdf,
                oylik_hisobot]  # Tarixni Excel fayl qilib yuklab olish xizmati
+    change_list_template = "admin/tarix_changelist.html"
 
     def colored_amaliyot_turi(self, obj):
         """Amaliyot turini rangli qilib ko‘rsatadi."""
@@ -338,10 +357,31 @@ class MahsulotBalansTarixAdmin(admin.ModelAdmin):
         return False  # Kirdi Chiqdi o'zgartirish huquqi yo'q
 
 
+# === MahsulotBalansTarixArxiv Admin ===
+# Arxivlangan yillarning tarixi (`ombor_arxivlash`): faqat ko'rish va yuklab olish.
+@admin.register(MahsulotBalansTarixArxiv)
+class MahsulotBalansTarixArxivAdmin(ReplikaAdminMixin, KalitliSahifalashMixin, admin.ModelAdmin):
+    list_display = ('id', 'mahsulot_nomi', 'miqdor', 'qoldiq', 'sana', 'amaliyot_turi', 'kimga', 'qayerga')
+    list_filter = (("sana", DateRangeQuickSelectListFilterBuilder()),)
+    list_select_related = ('mahsulot_nomi',)
+    ordering = KALIT_TARTIBI
+    list_per_page = 20
+    actions = [download_excel]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 # === KirdiChiqdi Admin ===
 # Bu bo'lim kirim-chiqim operatsiyalarini boshqarish uchun.
 @admin.register(KirdiChiqdi)
-class KirdiChiqdiAdmin(admin.ModelAdmin):
+class KirdiChiqdiAdmin(ReplikaAdminMixin, HarakatKunlariAdminMixin, KalitliSahifalashMixin, admin.ModelAdmin):
     form = KirdiChiqdiForm  # Maxsus forma qo'llanadi
     list_display = (
         'id', 'mahsulot_nomi', 'miqdor', 'get_olchov_birligi', 'formatted_summa', 'sana',
@@ -349,8 +389,9 @@ class KirdiChiqdiAdmin(admin.ModelAdmin):
     list_display_links = ('id', 'mahsulot_nomi')  # Mahsulotga bosilganda operatsiya ko'rsatiladi
     search_fields = ('mahsulot_nomi__mahsulot_nomi', 'amaliyot_turi')  # Mahsulot nomi va turiga qidiruv
     list_filter = ('amaliyot_turi', 'sana')  # Operatsiya turi va sanasi bo'yicha filter
-    date_hierarchy = 'sana'  # Sanalar bo'yicha navigatsiya
-    ordering = ('-sana',)  # Teskari tartibda tartib ko'rsatish
+    list_select_related = ('mahsulot_nomi__olchov_birligi',)  # get_olchov_birligi uchun JOIN
+    date_hierarchy = 'sana'  # Sanalar bo'yicha navigatsiya (HarakatKuni jadvalidan)
+    ordering = KALIT_TARTIBI  # Teskari tartibda ko'rsatish (kalitli sahifalash uchun)
     list_per_page = 20  # Bir sahifada ko'rsatilgan elementlar soni
     actions = [download_excel, download_pdf, oylik_hisobot]
     change_list_template = "admin/kirdi_chiqdi_changelist.html"
@@ -360,6 +401,17 @@ class KirdiChiqdiAdmin(admin.ModelAdmin):
         extra_context['kirdi_upload_url'] = reverse('kirdi_upload')
         return super().changelist_view(request, extra_context=extra_context)
 
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        # Admin forma tekshiruvi (o'qish) va saqlash bitta tranzaksiyada: SQLite'da bu tranzaksiya
+        # yozishga o'tolmasa, butun so'rov (forma bilan birga) qaytadan bajariladi
+        return band_bolsa_qaytarish(super().changeform_view)(request, object_id, form_url, extra_context)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Saqlangan harakat balansga yozilgan, shuning uchun uning miqdori va turi o'zgarmaydi
+        if obj is not None:
+            return ('mahsulot_nomi', 'miqdor', 'amaliyot_turi')
+        return super().get_readonly_fields(request, obj)
+
     def colored_amaliyot_turi(self, obj):
         """Amaliyot turini rangli qilib ko‘rsatadi."""
         if obj.amaliyot_turi == "Kirdi":
@@ -387,6 +439,56 @@ class KirdiChiqdiAdmin(admin.ModelAdmin):
     formatted_summa.short_description = "Summa (so'm)"
 
 
+# === ImportVazifa Admin ===
+# Bu bo'lim fonda bajariladigan Excel import vazifalarini kuzatish uchun.
+@admin.register(ImportVazifa)
+class ImportVazifaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'fayl', 'holat', 'faqat_tekshirish', 'qatorlar', 'saqlandi', 'xato_qatorlar',
+                    'xato_hisoboti', 'yaratgan', 'yaratildi', 'tugadi', 'holat_sahifasi')
+    list_filter = ('holat', 'faqat_tekshirish')
+    list_select_related = ('yaratgan',)
+    ordering = ('-id',)
+    list_per_page = 20
+
+    def holat_sahifasi(self, obj):
+        return format_html('<a href="{}">Ko\'rish</a>', reverse('import_vazifa', args=[obj.pk]))
+
+    holat_sahifasi.short_description = "Progress"
+
+    # Vazifalar faqat fayl yuklash sahifasi orqali yaratiladi
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# === Kunlik/Oylik balans yig'indilari ===
+# Yig'indilar harakat yozilganda avtomatik yangilanadi, qo'lda o'zgartirilmaydi.
+class BalansYigindisiAdmin(ReplikaAdminMixin, admin.ModelAdmin):
+    list_display = ('sana', 'mahsulot_nomi', 'boshlangich_qoldiq', 'kirdi', 'chiqdi', 'yakuniy_qoldiq',
+                    'kirdi_summa', 'chiqdi_summa')
+    list_filter = (("sana", DateRangeQuickSelectListFilterBuilder()),)
+    list_select_related = ('mahsulot_nomi',)
+    search_fields = ('mahsulot_nomi__mahsulot_nomi',)
+    ordering = ('-sana', 'mahsulot_nomi')
+    list_per_page = 50
+    actions = [download_excel]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(KunlikBalans, BalansYigindisiAdmin)
+admin.site.register(OylikBalans, BalansYigindisiAdmin)
+
+
 # Qo'shimcha konfiguratsiya
 # admin.site.site_header = "Tatuff Omborxona Boshqaruv Paneliga Xush Kelibsiz"  # Panelning bosh sarlavhasi
 # admin.site.site_title = "Omborxona boshqaruvi administratori"  # Browser title
@@ -0,0 +1,176 @@
+import csv
+import json
+import zlib
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.timezone import localtime
+from reportlab.lib import colors
+from reportlab.platypus import LongTable, TableStyle
+
+# Bir so'rovda bazadan o'qiladigan qatorlar soni
+CHUNK_SIZE = 2000
+
+# ForeignKey maydonlari uchun bog'langan modelning ko'rinadigan (__str__) maydoni
+KORINISH_MAYDONLARI = {
+    'ombor.mahsulot': 'mahsulot_nomi',
+    'ombor.olchovbirligi': 'olchov_birligi',
+}
+
+
+def eksport_ustunlari(model):
+    """
+    Model maydonlari uchun `(sarlavha, values_list yo'li)` juftliklari.
+
+    ForeignKey maydonlari bog'langan modelning nomi bilan JOIN orqali olinadi,
+    shuning uchun har bir qator uchun alohida so'rov bajarilmaydi.
+    """
+    ustunlar = []
+    for field in model._meta.fields:
+        yol = field.name
+        if field.is_relation:
+            korinish = KORINISH_MAYDONLARI.get(field.related_model._meta.label_lower)
+            yol = f"{field.name}__{korinish}" if korinish else field.attname
+        ustunlar.append((str(field.verbose_name), yol))
+    return ustunlar
+
+
+def qiymatni_formatlash(qiymat):
+    """Vaqtni mahalliy vaqtga o'tkazib formatlaydi, bo'sh qiymatni bo'sh satrga aylantiradi."""
+    if qiymat is None:
+        return ""
+    if isinstance(qiymat, datetime):
+        return localtime(qiymat).strftime('%Y-%m-%d %H:%M:%S')
+    return qiymat
+
+
+def eksport_qatorlari(queryset, yollar, chunk_size=CHUNK_SIZE):
+    """Querysetni `chunk_size` qatorlik bo'laklarda o'qib, formatlangan qatorlarni birma-bir qaytaradi."""
+    for qator in queryset.values_list(*yollar).iterator(chunk_size=chunk_size):
+        yield [qiymatni_formatlash(qiymat) for qiymat in qator]
+
+
+# PDF jadvalidagi qator balandligi va shrift o'lchami: matn o'ralmaydi, shuning uchun har bir qator bir xil balandlikda
+PDF_QATOR_BALANDLIGI = 12
+PDF_SHRIFT_OLCHAMI = 6.5
+AMALIYOT_RANGLARI = {"Kirdi": colors.green, "Chiqdi": colors.red}
+
+
+class OqimliFlowablelar(list):
+    """
+    `doc.build()` uchun flowable'lar ro'yxati, elementlarni generatordan kerak bo'lganda oladi.
+
+    build() ro'yxatning faqat boshi bilan ishlaydi, shuning uchun xotirada bir vaqtda
+    bitta sahifalik jadval (va uning bo'laklari) turadi.
+    """
+
+    def __init__(self, manba):
+        super().__init__()
+        self._manba = iter(manba)
+
+    def _toldirish(self):
+        if not super().__len__():
+            keyingi = next(self._manba, None)
+            if keyingi is not None:
+                self.append(keyingi)
+
+    def __len__(self):
+        self._toldirish()
+        return super().__len__()
+
+    def __getitem__(self, index):
+        self._toldirish()
+        return super().__getitem__(index)
+
+
+def pdf_ustun_kengliklari(model, kenglik):
+    """Ustun kengliklarini maydon turiga qarab hisoblab, sahifa kengligiga moslaydi."""
+    ogirliklar = [3]  # T/r
+    for field in model._meta.fields:
+        if field.is_relation or field.get_internal_type() == 'TextField':
+            ogirliklar.append(14)
+        elif field.get_internal_type() == 'DateTimeField':
+            ogirliklar.append(10)
+        else:
+            ogirliklar.append(min(max(len(str(field.verbose_name)), field.max_length or 6), 14))
+    jami = sum(ogirliklar)
+    return [kenglik * ogirlik / jami for ogirlik in ogirliklar]
+
+
+def pdf_jadvallari(sarlavhalar, qatorlar, sahifadagi_qatorlar, ustun_kengliklari, amaliyot_ustuni=None):
+    """
+    Qatorlarni sahifalik `LongTable` bo'laklariga ajratib qaytaradi.
+
+    Har bir bo'lak bitta sahifaga sig'adi va sarlavha qatori bilan boshlanadi;
+    uslub faqat shu bo'lakdagi qatorlar uchun hisoblanadi.
+    """
+    asosiy_uslub = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('FONTSIZE', (0, 0), (-1, -1), PDF_SHRIFT_OLCHAMI),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 1),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+    ]
+
+    def jadval(sahifa):
+        uslub = list(asosiy_uslub)
+        if amaliyot_ustuni is not None:
+            for row_num, qator in enumerate(sahifa, 1):
+                rang = AMALIYOT_RANGLARI.get(qator[amaliyot_ustuni])
+                if rang:
+                    uslub.append(('TEXTCOLOR', (amaliyot_ustuni, row_num), (amaliyot_ustuni, row_num), rang))
+        return LongTable([sarlavhalar] + sahifa, colWidths=ustun_kengliklari,
+                         rowHeights=PDF_QATOR_BALANDLIGI, repeatRows=1, style=TableStyle(uslub))
+
+    sahifa, bosh = [], True
+    for qator in qatorlar:
+        sahifa.append(qator)
+        if len(sahifa) == sahifadagi_qatorlar:
+            yield jadval(sahifa)
+            sahifa, bosh = [], False
+    if sahifa or bosh:  # Bo'sh tanlovda ham sarlavhali sahifa chiqadi
+        yield jadval(sahifa)
+
+
+class _Bufer:
+    """csv.writer uchun: yozilgan satrni saqlamasdan qaytaradi."""
+
+    def write(self, qiymat):
+        return qiymat
+
+
+def csv_oqimi(kalitlar, qatorlar, toplam=500):
+    """Sarlavha va qatorlarni CSV satrlari sifatida `toplam` qatordan guruhlab qaytaradi."""
+    writer = csv.writer(_Bufer())
+    yield writer.writerow(kalitlar)
+    bolak = []
+    for qator in qatorlar:
+        bolak.append(writer.writerow(qator))
+        if len(bolak) >= toplam:
+            yield "".join(bolak)
+            bolak = []
+    if bolak:
+        yield "".join(bolak)
+
+
+def ndjson_oqimi(kalitlar, qatorlar, toplam=500):
+    """Har bir qatorni alohida JSON obyekt (NDJSON) sifatida qaytaradi."""
+    bolak = []
+    for qator in qatorlar:
+        bolak.append(json.dumps(dict(zip(kalitlar, qator)), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n")
+        if len(bolak) >= toplam:
+            yield "".join(bolak)
+            bolak = []
+    if bolak:
+        yield "".join(bolak)
+
+
+def gzip_oqimi(satrlar):
+    """Matn oqimini gzip bilan siqib, bo'laklarni kelishi bilan qaytaradi."""
+    siquvchi = zlib.compressobj(wbits=31)  # 31: gzip sarlavhasi bilan
+    for satr in satrlar:
+        bolak = siquvchi.compress(satr.encode())
+        if bolak:
+            yield bolak
+    yield siquvchi.flush()
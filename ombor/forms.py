@@ -3,3 +3,42 @@ from django import forms
 
 class KirdiChiqdiUploadForm(forms.Form):
     file = forms.FileField(label="Excel faylni yuklang", required=True)
+    faqat_tekshirish = forms.BooleanField(label="Faqat tekshirish (ma'lumotlar saqlanmaydi)", required=False)
+
+
+class EksportForm(forms.Form):
+    FORMATLAR = [("csv", "CSV"), ("ndjson", "NDJSON")]
+
+    dan = forms.DateField(label="Sanadan", required=False)
+    gacha = forms.DateField(label="Sanagacha", required=False)
+    mahsulot = forms.IntegerField(label="Mahsulot ID", required=False, min_value=1)
+    format = forms.ChoiceField(choices=FORMATLAR, required=False)
+    gzip = forms.BooleanField(required=False)
+    arxiv = forms.BooleanField(required=False)  # Arxivlangan tarix ham qo'shilsin
+
+    def clean(self):
+        cleaned_data = super().clean()
+        dan, gacha = cleaned_data.get("dan"), cleaned_data.get("gacha")
+        if dan and gacha and dan > gacha:
+            raise forms.ValidationError("Boshlanish sanasi tugash sanasidan keyin bo'lishi mumkin emas!")
+        return cleaned_data
+
+
+class QoldiqlarApiForm(forms.Form):
+    mahsulot = forms.IntegerField(label="Mahsulot ID", required=False, min_value=1)
+    olchov_birligi = forms.IntegerField(label="O'lchov birligi ID", required=False, min_value=1)
+
+
+class HarakatlarApiForm(forms.Form):
+    oldin = forms.IntegerField(label="Shu ID dan oldingi harakatlar", required=False, min_value=1)
+    soni = forms.IntegerField(label="Harakatlar soni", required=False, min_value=1, max_value=500)
+
+
+class OylikHisobotForm(forms.Form):
+    oy = forms.DateField(label="Oy", input_formats=["%Y-%m"],
+                         widget=forms.DateInput(attrs={"type": "month"}, format="%Y-%m"))
+    summa_bilan = forms.BooleanField(label="Summa ustunini qo'shish", required=False)
+
+
+class QoldiqVaraqasiForm(forms.Form):
+    sana = forms.DateField(label="Sana", widget=forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"))
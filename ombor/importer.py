@@ -0,0 +1,299 @@
+import os
+import tempfile
+from collections import Counter
+from decimal import Decimal
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import xlsxwriter
+from django.core.files import File
+from django.utils import timezone
+
+from .models import ImportVazifa, KirdiChiqdi, Mahsulot, OlchovBirligi, APOSTROFLAR, NOM_REGEX
+from .models import nom_kaliti, nomni_formatlash
+
+# Excel fayldagi kerakli ustunlar: mahsulot nomi, miqdor, o'lchov birligi, summa
+USTUNLAR = ["mahsulot_nomi", "miqdor", "olchov_birligi", "summa"]
+KERAKLI_USTUNLAR = len(USTUNLAR)
+
+# Bir partiyada qayta ishlanadigan qatorlar soni
+PARTIYA_HAJMI = 1000
+
+# ImportVazifa.xatolar maydonida saqlanadigan xabarlar soni
+SAQLANADIGAN_XATOLAR = 500
+
+
+def partiyani_tekshirish(partiya):
+    """
+    Partiyadagi barcha qatorlarni vektorli (pandas) tekshiradi.
+
+    Har bir qator uchun xatolar matnini ('' - xato yo'q) va xato turlari sonini qaytaradi.
+    """
+    # Apostrof turlari (o‘, oʻ) saqlashda "'" ga keltiriladi, shuning uchun xato hisoblanmaydi
+    nomlar = partiya["mahsulot_nomi"].astype("string").str.strip().str.translate(APOSTROFLAR)
+    birliklar = partiya["olchov_birligi"].astype("string").str.strip().str.translate(APOSTROFLAR)
+    miqdor = pd.to_numeric(partiya["miqdor"], errors="coerce")
+    summa = pd.to_numeric(partiya["summa"], errors="coerce")
+
+    # Eski tekshiruv kabi: bo'sh katak yoki bo'sh satr to'liq bo'lmagan qator hisoblanadi
+    bosh = partiya[USTUNLAR].isna().any(axis=1) | nomlar.fillna("").eq("") | birliklar.fillna("").eq("")
+    tekshiruvlar = [
+        (bosh, "Ma'lumot to'liq emas"),
+        (~bosh & ~((summa > 0) & np.isfinite(summa)), "Summa musbat son bo'lishi kerak"),
+        (~bosh & ~((miqdor > 0) & (miqdor % 1 == 0)), "Miqdor musbat butun son bo'lishi kerak"),
+        (~bosh & ~nomlar.str.fullmatch(NOM_REGEX).fillna(False).astype(bool),
+         "Mahsulot nomida maxsus belgilar bor"),
+        (~bosh & ~birliklar.str.fullmatch(NOM_REGEX).fillna(False).astype(bool),
+         "O'lchov birligida maxsus belgilar bor"),
+    ]
+
+    xatolar = pd.Series("", index=partiya.index, dtype=object)
+    xato_turlari = Counter()
+    for maska, xabar in tekshiruvlar:
+        if maska.any():
+            xatolar[maska] += xabar + "; "
+            xato_turlari[xabar] += int(maska.sum())
+    return xatolar.str.rstrip("; "), xato_turlari
+
+
+class ImportNatija:
+    def __init__(self):
+        self.jami = None  # Fayl o'lchamidan taxminiy qatorlar soni (noma'lum bo'lishi mumkin)
+        self.qatorlar = 0  # Sarlavhadan keyingi barcha qatorlar
+        self.saqlandi = 0  # Bazaga yozilgan harakatlar
+        self.xato_qatorlar = 0  # O'tkazib yuborilgan qatorlar
+        self.xato_turlari = Counter()  # Tekshiruv xatolari turi bo'yicha
+        self.xatolar = []  # Bazaga bog'liq xatolar (masalan, boshqa o'lchov birligidagi mahsulot)
+
+    def xulosa(self):
+        """Barcha xatolar bo'yicha bitta qisqa xulosa qatorlari."""
+        return [f"{xabar}: {soni} ta qator" for xabar, soni in self.xato_turlari.most_common()] + self.xatolar
+
+
+class KirdiImporter:
+    """
+    Kirdi Excel faylini oqim (read_only) rejimida partiyalab import qiladi.
+
+    O'lchov birliklari va mahsulotlar fayl boshida bir marta lug'atga yuklanadi, yangilari
+    partiya bo'yicha `bulk_create` bilan yaratiladi, harakatlar esa `post_many` orqali yoziladi.
+    Xotira fayl hajmiga emas, partiya hajmiga bog'liq.
+    """
+
+    def __init__(self, partiya_hajmi=PARTIYA_HAJMI, progress=None):
+        self.partiya_hajmi = partiya_hajmi
+        self.progress = progress  # progress(natija) har bir partiyadan keyin chaqiriladi
+        self.natija = ImportNatija()
+        self.birliklar = None
+        self.mahsulotlar = None
+
+    def partiyalar(self, fayl):
+        """Faylni `partiya_hajmi` qatorli DataFrame'lar ko'rinishida o'qiydi (indeks - Excel qator raqami)."""
+        wb = openpyxl.load_workbook(fayl, read_only=True, data_only=True)
+        try:
+            sheet = wb.active
+            if sheet.max_row:
+                self.natija.jami = sheet.max_row - 1
+            qatorlar = sheet.iter_rows(values_only=True)
+            sarlavha = next(qatorlar, None)
+            if sarlavha is None or len(sarlavha) < KERAKLI_USTUNLAR:
+                raise ValueError("Faylda kerakli ustunlar yetarli emas!")
+
+            partiya, raqamlar = [], []
+            for raqam, qator in enumerate(qatorlar, start=2):
+                partiya.append((tuple(qator) + (None,) * KERAKLI_USTUNLAR)[:KERAKLI_USTUNLAR])
+                raqamlar.append(raqam)
+                if len(partiya) >= self.partiya_hajmi:
+                    yield pd.DataFrame.from_records(partiya, columns=USTUNLAR, index=raqamlar)
+                    partiya, raqamlar = [], []
+            if partiya:
+                yield pd.DataFrame.from_records(partiya, columns=USTUNLAR, index=raqamlar)
+        finally:
+            wb.close()
+
+    def tekshirish(self, fayl, hisobot_fayli=None):
+        """
+        Bazaga hech narsa yozmasdan butun faylni tekshiradi.
+
+        `hisobot_fayli` berilsa, xato qatorlar shu yo'lga XLSX hisobot sifatida yoziladi.
+        """
+        natija = self.natija
+        hisobot = xlsxwriter.Workbook(hisobot_fayli, {'constant_memory': True}) if hisobot_fayli else None
+        try:
+            if hisobot:
+                sheet = hisobot.add_worksheet("Xatolar")
+                sarlavha_format = hisobot.add_format({'bold': True, 'bg_color': '#D3D3D3', 'border': 1})
+                sheet.set_column(1, 1, 40)
+                sheet.set_column(5, 5, 60)
+                sheet.write_row(0, 0, ["Qator", "Mahsulot nomi", "Miqdor", "O'lchov birligi", "Summa", "Xatolar"],
+                                sarlavha_format)
+                hisobot_qatori = 1
+
+            for partiya in self.partiyalar(fayl):
+                xatolar, xato_turlari = partiyani_tekshirish(partiya)
+                natija.qatorlar += len(partiya)
+                natija.xato_turlari += xato_turlari
+
+                notogri = xatolar != ""
+                natija.xato_qatorlar += int(notogri.sum())
+                if hisobot:
+                    for raqam, qator in partiya[notogri].iterrows():
+                        qiymatlar = ["" if pd.isna(qiymat) else str(qiymat) for qiymat in qator]
+                        sheet.write_row(hisobot_qatori, 0, [raqam] + qiymatlar + [xatolar[raqam]])
+                        hisobot_qatori += 1
+                if self.progress:
+                    self.progress(natija)
+        finally:
+            if hisobot:
+                hisobot.close()
+        return natija
+
+    def import_qilish(self, fayl):
+        # Faqat fayldagi nomlar `kalit` unikal indeksi orqali partiyalab o'qiladi va shu yerda saqlanadi
+        self.birliklar, self.mahsulotlar = {}, {}
+        for partiya in self.partiyalar(fayl):
+            self.partiyani_yozish(partiya)
+        return self.natija
+
+    def birliklarni_olish(self, nomlar):
+        """`{kalit: nom}` dagi o'lchov birliklarini bazadan oladi, yo'qlarini yaratadi."""
+        nomlar = {kalit: nom for kalit, nom in nomlar.items() if kalit not in self.birliklar}
+        if not nomlar:
+            return
+        self.birliklar.update((b.kalit, b) for b in OlchovBirligi.objects.filter(kalit__in=nomlar))
+        yangilar = [kalit for kalit in nomlar if kalit not in self.birliklar]
+        if not yangilar:
+            return
+        OlchovBirligi.objects.bulk_create(
+            [OlchovBirligi(olchov_birligi=nomni_formatlash(nomlar[kalit]), kalit=kalit) for kalit in yangilar],
+            ignore_conflicts=True
+        )
+        # ignore_conflicts pk qaytarmaydi: yaratilganlarni (yoki boshqa so'rov yaratganlarni) qayta o'qiymiz
+        self.birliklar.update((b.kalit, b) for b in OlchovBirligi.objects.filter(kalit__in=yangilar))
+
+    def mahsulotlarni_olish(self, mahsulotlar):
+        """`{kalit: (nom, birlik_kaliti)}` dagi mahsulotlarni bazadan oladi, yo'qlarini yaratadi."""
+        mahsulotlar = {kalit: qiymat for kalit, qiymat in mahsulotlar.items() if kalit not in self.mahsulotlar}
+        if not mahsulotlar:
+            return
+        self.mahsulotlar.update((m.kalit, m) for m in Mahsulot.objects.filter(kalit__in=mahsulotlar))
+        yangilar = [kalit for kalit in mahsulotlar if kalit not in self.mahsulotlar]
+        if not yangilar:
+            return
+        Mahsulot.objects.bulk_create(
+            [
+                Mahsulot(mahsulot_nomi=nomni_formatlash(mahsulotlar[kalit][0]), kalit=kalit,
+                         olchov_birligi=self.birliklar[mahsulotlar[kalit][1]])
+                for kalit in yangilar if mahsulotlar[kalit][1] in self.birliklar
+            ],
+            ignore_conflicts=True
+        )
+        self.mahsulotlar.update((m.kalit, m) for m in Mahsulot.objects.filter(kalit__in=yangilar))
+
+    def partiyani_yozish(self, partiya):
+        natija = self.natija
+        natija.qatorlar += len(partiya)
+
+        # 1) Butun partiyani vektorli tekshirish, xato qatorlar o'tkazib yuboriladi
+        xatolar, xato_turlari = partiyani_tekshirish(partiya)
+        natija.xato_turlari += xato_turlari
+        togri = partiya[xatolar == ""]
+        natija.xato_qatorlar += len(partiya) - len(togri)
+
+        # 2) Partiyadagi nomlarni kalit bo'yicha bir martada o'qish, yo'qlarini yaratish
+        tekshirilgan = []
+        birliklar, mahsulotlar = {}, {}
+        for raqam, mahsulot_nomi, miqdor, olchov_birligi, summa in togri.itertuples():
+            mahsulot_nomi, olchov_birligi = str(mahsulot_nomi).strip(), str(olchov_birligi).strip()
+            birlik_kaliti, mahsulot_kaliti = nom_kaliti(olchov_birligi), nom_kaliti(mahsulot_nomi)
+            birliklar.setdefault(birlik_kaliti, olchov_birligi)
+            mahsulotlar.setdefault(mahsulot_kaliti, (mahsulot_nomi, birlik_kaliti))
+            tekshirilgan.append((raqam, mahsulot_kaliti, birlik_kaliti, int(float(miqdor)), Decimal(str(summa))))
+
+        self.birliklarni_olish(birliklar)
+        self.mahsulotlarni_olish(mahsulotlar)
+
+        # 3) Harakatlarni yig'ib, bitta post_many bilan yozish
+        harakatlar = []
+        for raqam, mahsulot_kaliti, birlik_kaliti, miqdor, summa in tekshirilgan:
+            mahsulot = self.mahsulotlar.get(mahsulot_kaliti)
+            birlik = self.birliklar.get(birlik_kaliti)
+            if mahsulot is None or birlik is None:
+                natija.xato_qatorlar += 1
+                natija.xatolar.append(f"{raqam}-qator: mahsulotni yaratib bo'lmadi")
+                continue
+            if mahsulot.olchov_birligi_id != birlik.pk:
+                natija.xato_qatorlar += 1
+                natija.xatolar.append(
+                    f"{raqam}-qator: '{mahsulot.mahsulot_nomi}' nomli mahsulot bazada boshqa o'lchov birligi "
+                    f"bilan mavjud!"
+                )
+                continue
+            harakatlar.append(
+                KirdiChiqdi(mahsulot_nomi=mahsulot, miqdor=miqdor, summa=summa, amaliyot_turi="Kirdi")
+            )
+
+        KirdiChiqdi.objects.post_many(harakatlar)
+        natija.saqlandi += len(harakatlar)
+
+        if self.progress:
+            self.progress(natija)
+
+
+def navbatdagi_vazifani_olish():
+    """Navbatdagi eng eski vazifani band qiladi. Bir nechta ishchi bitta vazifani olmasligi uchun shartli UPDATE."""
+    for vazifa in ImportVazifa.objects.filter(holat=ImportVazifa.NAVBATDA).order_by('id')[:5]:
+        if ImportVazifa.objects.filter(pk=vazifa.pk, holat=ImportVazifa.NAVBATDA).update(
+                holat=ImportVazifa.BAJARILMOQDA, boshlandi=timezone.now()):
+            vazifa.refresh_from_db()
+            return vazifa
+    return None
+
+
+def vazifani_bajarish(vazifa, partiya_hajmi=PARTIYA_HAJMI):
+    """
+    Band qilingan vazifani bajaradi: avval butun fayl tekshiriladi va xato hisoboti saqlanadi,
+    so'ng (faqat tekshirish tanlanmagan bo'lsa) to'g'ri qatorlar import qilinadi.
+    """
+    def progress(natija):
+        ImportVazifa.objects.filter(pk=vazifa.pk).update(
+            jami_qatorlar=natija.jami,
+            qatorlar=natija.qatorlar,
+            saqlandi=natija.saqlandi,
+            xato_qatorlar=natija.xato_qatorlar,
+        )
+
+    importer = KirdiImporter(partiya_hajmi=partiya_hajmi, progress=progress)
+    natija = importer.natija
+    try:
+        # 1) Tekshirish bosqichi: bazaga hech narsa yozilmaydi
+        hisobot_fd, hisobot_yoli = tempfile.mkstemp(suffix=".xlsx")
+        os.close(hisobot_fd)
+        try:
+            with vazifa.fayl.open('rb') as fayl:
+                importer.tekshirish(fayl, hisobot_yoli)
+            if natija.xato_qatorlar:
+                with open(hisobot_yoli, 'rb') as hisobot:
+                    vazifa.xato_hisoboti.save(f"xatolar_{vazifa.pk}.xlsx", File(hisobot), save=False)
+        finally:
+            os.remove(hisobot_yoli)
+
+        # 2) Import bosqichi: to'g'ri qatorlar yoziladi, xatolar hisobotda qoladi
+        if not vazifa.faqat_tekshirish:
+            importer.natija = natija = ImportNatija()
+            with vazifa.fayl.open('rb') as fayl:
+                importer.import_qilish(fayl)
+    except Exception as e:
+        vazifa.holat = ImportVazifa.XATO
+        natija.xatolar.insert(0, f"Xatolik yuz berdi: {e}")
+    else:
+        vazifa.holat = ImportVazifa.TAYYOR
+
+    vazifa.jami_qatorlar = natija.jami
+    vazifa.qatorlar = natija.qatorlar
+    vazifa.saqlandi = natija.saqlandi
+    vazifa.xato_qatorlar = natija.xato_qatorlar
+    vazifa.xatolar = "\n".join(natija.xulosa()[:SAQLANADIGAN_XATOLAR])
+    vazifa.tugadi = timezone.now()
+    vazifa.save()
+    return vazifa
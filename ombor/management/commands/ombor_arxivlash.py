@@ -0,0 +1,75 @@
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from ombor.models import HarakatKuni, Mahsulot, MahsulotBalans, MahsulotBalansTarix, MahsulotBalansTarixArxiv
+
+
+def boshlangich_qoldiqlar(ochilish):
+    """Tarixi arxivlanadigan har bir mahsulotning `ochilish` dan oldingi oxirgi qoldig'i."""
+    eski = MahsulotBalansTarix.objects.filter(sana__lt=ochilish)
+    oxirgi_qoldiq = eski.filter(mahsulot_nomi=OuterRef('pk')).order_by('-sana', '-id').values('qoldiq')[:1]
+    return list(
+        Mahsulot.objects
+        .filter(pk__in=eski.values('mahsulot_nomi'))
+        .annotate(qoldiq=Subquery(oxirgi_qoldiq))
+        .values_list('pk', 'qoldiq')
+    )
+
+
+def yozuvlarni_kochirish(ochilish, chunk_size):
+    """`ochilish` dan oldingi tarix yozuvlarini ID tartibida bo'laklab arxivga ko'chiradi."""
+    maydonlar = [field.attname for field in MahsulotBalansTarix._meta.concrete_fields]
+    eski = MahsulotBalansTarix.objects.filter(sana__lt=ochilish).order_by('id')
+    kochirildi = 0
+    while True:
+        bolak = list(eski.values(*maydonlar)[:chunk_size])
+        if not bolak:
+            return kochirildi
+        MahsulotBalansTarixArxiv.objects.bulk_create(MahsulotBalansTarixArxiv(**qator) for qator in bolak)
+        # ID ro'yxati o'rniga oraliq: SQLite parametrlar soni chekloviga tushmaslik uchun
+        eski.filter(id__lte=bolak[-1]['id']).delete()
+        kochirildi += len(bolak)
+
+
+class Command(BaseCommand):
+    help = ("Yopilgan yillarning mahsulot balans tarixini arxiv jadvaliga ko'chiradi va har bir mahsulot "
+            "uchun boshlang'ich qoldiq yozuvini qoldiradi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('yil', type=int, help="Shu yil oxirigacha bo'lgan tarix arxivlanadi")
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Bir so'rovda ko'chiriladigan yozuvlar soni")
+
+    def handle(self, *args, **options):
+        yil = options['yil']
+        if yil >= timezone.localdate().year:
+            raise CommandError("Faqat yopilgan (o'tgan) yillarni arxivlash mumkin.")
+
+        # Boshlang'ich yozuv davrning oxirgi lahzasiga qo'yiladi: keyingi yilning barcha yozuvlaridan oldin turadi
+        ochilish = timezone.make_aware(datetime(yil + 1, 1, 1)) - timedelta(microseconds=1)
+        with transaction.atomic():
+            # Arxivlash vaqtida yangi harakat yozilmasligi uchun barcha balanslar qulflanadi
+            MahsulotBalans.objects.hammasini_qulflash()
+
+            qoldiqlar = boshlangich_qoldiqlar(ochilish)
+            kochirildi = yozuvlarni_kochirish(ochilish, options['chunk_size'])
+            MahsulotBalansTarix.objects.bulk_create(
+                MahsulotBalansTarix(mahsulot_nomi_id=mahsulot_id, miqdor=qoldiq, qoldiq=qoldiq, sana=ochilish,
+                                    amaliyot_turi=MahsulotBalansTarix.BOSHLANGICH)
+                for mahsulot_id, qoldiq in qoldiqlar
+            )
+            # Tarix navigatsiyasida arxivlangan kunlar qolmaydi, boshlang'ich yozuvlar kuni qo'shiladi
+            HarakatKuni.objects.kunlarni_tozalash(
+                MahsulotBalansTarix,
+                HarakatKuni.objects.kunlar(MahsulotBalansTarix).filter(sana__lt=date(yil + 1, 1, 1))
+                .values_list('sana', flat=True)
+            )
+            if qoldiqlar:
+                HarakatKuni.objects.kunlarni_qoshish([ochilish], [MahsulotBalansTarix])
+
+        self.stdout.write(f"{yil} yil oxirigacha: {kochirildi} ta yozuv arxivlandi, "
+                          f"{len(qoldiqlar)} ta boshlang'ich qoldiq yozuvi qo'shildi")
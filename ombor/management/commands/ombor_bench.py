@@ -0,0 +1,188 @@
+import io
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import django
+from django.contrib import admin
+from django.contrib.admin import helpers
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases
+from django.urls import reverse
+from django.utils import timezone
+from django_otp import DEVICE_ID_SESSION_KEY
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from ombor.importer import navbatdagi_vazifani_olish, vazifani_bajarish
+from ombor.models import CustomUser
+from ombor.sintetik import SintetikOmbor
+
+# Benchmark davomida haqiqiy kesh (masalan memcached) ifloslanmasligi uchun alohida xotira keshi
+BENCH_KESHI = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ombor-bench'}}
+
+
+def olchash(funksiya, takrorlar):
+    """
+    `funksiya` ni `takrorlar` marta bajarib vaqt (ms) va so'rovlar sonini, so'ng yana bir marta
+    tracemalloc bilan eng yuqori xotira sarfini o'lchaydi (tracemalloc vaqt o'lchoviga qo'shilmaydi).
+    """
+    vaqtlar, sorovlar = [], []
+    for _ in range(takrorlar):
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as sorovlar_konteksti:
+            boshi = time.perf_counter()
+            funksiya()
+            vaqtlar.append((time.perf_counter() - boshi) * 1000)
+        sorovlar.append(len(sorovlar_konteksti))
+
+    tracemalloc.start()
+    try:
+        funksiya()
+        _, eng_yuqori = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "takrorlar": takrorlar,
+        "vaqt_ms": {
+            "median": round(statistics.median(vaqtlar), 2),
+            "min": round(min(vaqtlar), 2),
+            "max": round(max(vaqtlar), 2),
+        },
+        "sorovlar": max(sorovlar),
+        "xotira_kb": round(eng_yuqori / 1024),
+    }
+
+
+def javobni_oqish(javob):
+    """Oqimli javob ham to'liq o'qiladi: eksport vaqti faylni yuborish bilan tugaydi."""
+    if javob.streaming:
+        b"".join(javob.streaming_content)
+    assert javob.status_code in (200, 302), f"HTTP {javob.status_code}"
+
+
+class Command(BaseCommand):
+    help = ("Sintetik ombor ma'lumotlarida asosiy amallarni (harakat yozish, Excel yuklash, admin eksport "
+            "amallari va changelistlar) o'lchaydi: vaqt, so'rovlar soni va xotira.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--birliklar', type=int, default=10, help="O'lchov birliklari soni")
+        parser.add_argument('--mahsulotlar', type=int, default=200, help="Mahsulotlar soni")
+        parser.add_argument('--harakatlar', type=int, default=20000, help="Sintetik harakatlar soni")
+        parser.add_argument('--chiqdi-ulushi', type=float, default=0.4,
+                            help="Qoldiq yetarli bo'lganda Chiqdi harakati ehtimoli")
+        parser.add_argument('--kunlar', type=int, default=365, help="Harakatlar shuncha kunga yoyiladi")
+        parser.add_argument('--excel-qatorlar', type=int, default=500, help="Yuklanadigan Excel fayl qatorlari")
+        parser.add_argument('--takrorlar', type=int, default=5, help="Har bir amal necha marta o'lchanadi")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--json', metavar='FAYL',
+                            help="Natijalarni JSON faylga yozish ('-' - standart chiqishga)")
+        parser.add_argument('--joriy-baza', action='store_true',
+                            help="Vaqtinchalik baza yaratmasdan joriy (bo'sh) bazada ishlash: ma'lumotlar qoladi!")
+
+    def handle(self, *args, **options):
+        eski_bazalar = None
+        if not options['joriy_baza']:
+            # Test runner kabi alohida baza yaratiladi va migratsiya qilinadi
+            eski_bazalar = setup_databases(verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS})
+        try:
+            with tempfile.TemporaryDirectory() as media, override_settings(
+                    CACHES=BENCH_KESHI, MEDIA_ROOT=media, ALLOWED_HOSTS=['testserver']):
+                natijalar = self.benchmark(options)
+        finally:
+            if eski_bazalar is not None:
+                teardown_databases(eski_bazalar, verbosity=0)
+
+        hisobot = {
+            "vaqt": timezone.now().isoformat(),
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "baza": connections[DEFAULT_DB_ALIAS].vendor,
+            "parametrlar": {nom: options[nom] for nom in (
+                'birliklar', 'mahsulotlar', 'harakatlar', 'chiqdi_ulushi', 'kunlar', 'excel_qatorlar',
+                'takrorlar', 'seed')},
+            "natijalar": natijalar,
+        }
+        self.jadval(natijalar)
+        if options['json'] == '-':
+            self.stdout.write(json.dumps(hisobot, ensure_ascii=False, indent=2))
+        elif options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as fayl:
+                json.dump(hisobot, fayl, ensure_ascii=False, indent=2)
+            self.stdout.write(f"JSON: {options['json']}")
+
+    def benchmark(self, options):
+        ombor = SintetikOmbor(options['birliklar'], options['mahsulotlar'], options['chiqdi_ulushi'],
+                              options['seed'])
+        boshi = time.perf_counter()
+        ombor.mahsulotlarni_yaratish()
+        ombor.harakatlarni_yaratish(options['harakatlar'], options['kunlar'])
+        call_command('ombor_yigindilar', stdout=io.StringIO())
+        self.stdout.write(f"Sintetik ma'lumotlar: {options['harakatlar']} ta harakat, "
+                          f"{time.perf_counter() - boshi:.1f} s")
+
+        client = self.admin_client()
+        takrorlar = options['takrorlar']
+        natijalar = []
+
+        def olchov(nomi, funksiya):
+            natija = {"nomi": nomi, **olchash(funksiya, takrorlar)}
+            natijalar.append(natija)
+            self.stdout.write(f"  {nomi}: {natija['vaqt_ms']['median']} ms")
+
+        olchov("KirdiChiqdi.save: Kirdi", lambda: ombor.kirdi().save())
+        olchov("KirdiChiqdi.save: Chiqdi", lambda: ombor.chiqdi().save())
+
+        excel = ombor.excel_fayl(options['excel_qatorlar'])
+        olchov("Excel yuklash: kirdi_upload_view", lambda: javobni_oqish(client.post(
+            reverse('kirdi_upload'), {'file': SimpleUploadedFile("kirdi.xlsx", excel)})))
+        # Har bir yuklash bitta vazifa qo'ydi, import ishchisi ularni birma-bir bajaradi
+        olchov("Excel import: vazifani_bajarish", lambda: vazifani_bajarish(navbatdagi_vazifani_olish()))
+
+        for model, model_admin in self.admin_modellari():
+            url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            olchov(f"Changelist: {model._meta.model_name}", lambda url=url: javobni_oqish(client.get(url)))
+            for amal in model_admin.actions or []:
+                nomi = amal.__name__
+                malumot = {
+                    'action': nomi, 'select_across': '1', 'index': '0', helpers.ACTION_CHECKBOX_NAME: ['1'],
+                    # oylik_hisobot oraliq sahifasiz: joriy oy
+                    'apply': '1', 'oy': f"{timezone.localdate():%Y-%m}",
+                }
+                olchov(f"Amal: {model._meta.model_name}.{nomi}",
+                       lambda url=url, malumot=malumot: javobni_oqish(client.post(url, malumot)))
+        return natijalar
+
+    def admin_modellari(self):
+        return sorted(
+            ((model, model_admin) for model, model_admin in admin.site._registry.items()
+             if model._meta.app_label == 'ombor'),
+            key=lambda juft: juft[0]._meta.model_name,
+        )
+
+    def admin_client(self):
+        """OTP tasdiqlangan superuser sessiyasi (admin sahifalari `admin_view` orqali himoyalangan)."""
+        user = CustomUser.objects.create_superuser("ombor_bench", "bench@tatuff.uz", None)
+        device = TOTPDevice.objects.create(user=user, name="ombor_bench")
+        client = Client()
+        client.force_login(user)
+        session = client.session
+        session[DEVICE_ID_SESSION_KEY] = device.persistent_id
+        session.save()
+        return client
+
+    def jadval(self, natijalar):
+        sarlavha = f"{'Amal':<48} {'median ms':>10} {'min ms':>10} {'max ms':>10} {'sorovlar':>9} {'xotira KB':>10}"
+        self.stdout.write(sarlavha)
+        self.stdout.write("-" * len(sarlavha))
+        for natija in natijalar:
+            vaqt = natija['vaqt_ms']
+            self.stdout.write(
+                f"{natija['nomi']:<48} {vaqt['median']:>10} {vaqt['min']:>10} {vaqt['max']:>10} "
+                f"{natija['sorovlar']:>9} {natija['xotira_kb']:>10}"
+            )
@@ -0,0 +1,82 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from ombor.models import KirdiChiqdi, KunlikBalans, MahsulotBalans, MahsulotBalansTarix
+from ombor.sahifalash import KALIT_TARTIBI
+
+# To'liq jadval skanerlashini bildiruvchi qatorlar (SQLite: "SCAN jadval" indekssiz, PostgreSQL: "Seq Scan")
+TOLIQ_SKANER = {
+    'sqlite': re.compile(r"\bSCAN (?!.*\bUSING\b)"),
+    'postgresql': re.compile(r"\bSeq Scan\b"),
+}
+
+
+def tezkor_sorovlar():
+    """Ko'p bajariladigan so'rovlar: `(nomi, queryset)`. Qiymatlar rejaga ta'sir qilmaydi."""
+    hozir = timezone.now()
+    oy_boshi = hozir - timedelta(days=30)
+    return [
+        ("Chiqdi: balansni shartli yangilash",
+         MahsulotBalans.objects.filter(mahsulot_nomi_id=1, qoldiq__gte=1)),
+        ("Qoldiq sanada (bitta mahsulot)",
+         MahsulotBalansTarix.objects._oxirgi_yozuv(hozir).filter(mahsulot_nomi_id=1).values('qoldiq')[:1]),
+        ("Qoldiq sanada (barcha mahsulotlar)",
+         MahsulotBalansTarix.objects.qoldiqlar_sanada(hozir)),
+        ("Tarix: mahsulot bo'yicha oxirgi yozuv",
+         MahsulotBalansTarix.objects.filter(mahsulot_nomi_id=1).order_by('-sana', '-id')[:1]),
+        ("Tarix admin: sana oralig'i",
+         MahsulotBalansTarix.objects.filter(sana__gte=oy_boshi, sana__lt=hozir).order_by(*KALIT_TARTIBI)[:20]),
+        ("Tarix admin: kalitli sahifa",
+         MahsulotBalansTarix.objects.filter(Q(sana__lt=hozir) | Q(sana=hozir, pk__lt=1), sana__lte=hozir)
+         .order_by(*KALIT_TARTIBI)[:21]),
+        ("KirdiChiqdi admin: ro'yxat (-sana, -id)",
+         KirdiChiqdi.objects.select_related('mahsulot_nomi__olchov_birligi').order_by(*KALIT_TARTIBI)[:20]),
+        ("KirdiChiqdi admin: kalitli sahifa",
+         KirdiChiqdi.objects.filter(Q(sana__lt=hozir) | Q(sana=hozir, pk__lt=1), sana__lte=hozir)
+         .order_by(*KALIT_TARTIBI)[:21]),
+        ("KirdiChiqdi admin: amaliyot turi filtri",
+         KirdiChiqdi.objects.filter(amaliyot_turi="Chiqdi").order_by(*KALIT_TARTIBI)[:20]),
+        ("KirdiChiqdi admin: date_hierarchy",
+         KirdiChiqdi.objects.filter(sana__gte=oy_boshi, sana__lt=hozir).order_by(*KALIT_TARTIBI)[:20]),
+        ("Oylik hisobot (GROUP BY)",
+         KirdiChiqdi.objects.oylik_chiqim(oy_boshi, hozir)),
+        ("Eksport: mahsulot harakatlari (sana, id tartibida)",
+         KirdiChiqdi.objects.filter(mahsulot_nomi_id=1).order_by('sana', 'id')),
+        ("Kunlik yig'indilar: sana oralig'i",
+         KunlikBalans.objects.filter(sana__gte=oy_boshi.date(), sana__lte=hozir.date())),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Asosiy so'rovlarning EXPLAIN rejalarini chiqaradi (SQLite va PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help="PostgreSQL'da EXPLAIN ANALYZE (so'rovlar haqiqatda bajariladi)")
+        parser.add_argument('--qatiy', action='store_true',
+                            help="Biror so'rov to'liq jadval skanerlasa xato bilan tugaydi")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        explain_opts = {'analyze': True} if options['analyze'] and vendor == 'postgresql' else {}
+        skaner = TOLIQ_SKANER.get(vendor)
+
+        muammolar = []
+        for nomi, queryset in tezkor_sorovlar():
+            reja = queryset.explain(**explain_opts)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {nomi}"))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(reja + "\n")
+            if skaner and skaner.search(reja):
+                muammolar.append(nomi)
+
+        if muammolar:
+            xabar = "To'liq skanerlash: " + ", ".join(muammolar)
+            if options['qatiy']:
+                raise CommandError(xabar)
+            self.stdout.write(self.style.WARNING(xabar))
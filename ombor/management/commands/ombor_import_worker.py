@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ombor.importer import navbatdagi_vazifani_olish, vazifani_bajarish
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi Excel import vazifalarini HTTP so'rovidan tashqarida bajaradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Navbatdagi barcha vazifalarni bajarib, chiqib ketish")
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Navbat bo'sh bo'lganda kutish vaqti (soniya)")
+
+    def handle(self, *args, **options):
+        while True:
+            vazifa = navbatdagi_vazifani_olish()
+            if vazifa is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f"#{vazifa.pk} import boshlandi: {vazifa.fayl.name}")
+            vazifa = vazifani_bajarish(vazifa)
+            self.stdout.write(
+                f"#{vazifa.pk} {vazifa.get_holat_display()}: {vazifa.saqlandi} saqlandi, "
+                f"{vazifa.xato_qatorlar} xato, {vazifa.davomiyligi:.1f} s"
+            )
@@ -0,0 +1,188 @@
+import json
+import multiprocessing
+import random
+import statistics
+import threading
+import time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.db.models import Q, Sum
+from django.test.utils import setup_databases, teardown_databases
+
+from ombor.models import KirdiChiqdi, MahsulotBalans, MahsulotBalansTarix
+from ombor.sintetik import KIMGA, QAYERGA, SintetikOmbor
+
+
+def oqim_ishchisi(mahsulot_idlar, harakatlar_soni, chiqdi_ulushi, seed, natijalar):
+    """Bitta oqim: tasodifiy Kirdi/Chiqdi harakatlarini `save()` bilan yozadi, `(holat, ms)` ni yig'adi."""
+    tasodif = random.Random(seed)
+    try:
+        for _ in range(harakatlar_soni):
+            harakat = KirdiChiqdi(mahsulot_nomi_id=tasodif.choice(mahsulot_idlar), miqdor=tasodif.randint(1, 10),
+                                  summa=Decimal(1000), amaliyot_turi="Kirdi")
+            if tasodif.random() < chiqdi_ulushi:
+                harakat.amaliyot_turi = "Chiqdi"
+                harakat.kimga, harakat.qayerga = tasodif.choice(KIMGA), tasodif.choice(QAYERGA)
+            boshi = time.perf_counter()
+            try:
+                harakat.save()
+                holat = "yozildi"
+            except ValidationError:
+                holat = "rad_etildi"  # Qoldiq yetarli emas: kutilgan natija
+            except OperationalError:
+                holat = "xato"  # Qayta urinishlardan keyin ham baza band
+            natijalar.append((holat, (time.perf_counter() - boshi) * 1000))
+    finally:
+        connection.close()
+
+
+def jarayon_ishchisi(parametrlar):
+    """Bitta jarayon: `oqimlar` ta oqimni bir vaqtda boshlaydi va barcha natijalarni qaytaradi."""
+    mahsulot_idlar, oqimlar, harakatlar_soni, chiqdi_ulushi, seed = parametrlar
+    natijalar = []
+    ishchilar = [
+        threading.Thread(target=oqim_ishchisi,
+                         args=(mahsulot_idlar, harakatlar_soni, chiqdi_ulushi, seed * 1000 + i, natijalar))
+        for i in range(oqimlar)
+    ]
+    for ishchi in ishchilar:
+        ishchi.start()
+    for ishchi in ishchilar:
+        ishchi.join()
+    connections.close_all()
+    return natijalar
+
+
+def invariantlarni_tekshirish():
+    """
+    Yozuvlardan keyingi balans invariantlari. Buzilishlar ro'yxatini qaytaradi (bo'sh - hammasi joyida):
+    joriy qoldiq harakatlar yig'indisiga teng, tarix yozuvlari yozilish (sana, ID) tartibida har bir harakatni
+    oldingi qoldiqqa qo'shadi yoki ayiradi va oxirgi tarix qoldig'i joriy qoldiqqa teng, hech bir qoldiq manfiy emas.
+    """
+    buzilishlar = []
+    harakat_yigindilari = dict(
+        KirdiChiqdi.objects.values('mahsulot_nomi_id')
+        .annotate(yigindi=Sum('miqdor', filter=Q(amaliyot_turi="Kirdi"), default=0)
+                  - Sum('miqdor', filter=Q(amaliyot_turi="Chiqdi"), default=0))
+        .values_list('mahsulot_nomi_id', 'yigindi')
+    )
+    balanslar = dict(MahsulotBalans.objects.values_list('mahsulot_nomi_id', 'qoldiq'))
+    for mahsulot_id in harakat_yigindilari.keys() | balanslar.keys():
+        qoldiq, yigindi = balanslar.get(mahsulot_id), harakat_yigindilari.get(mahsulot_id, 0)
+        if qoldiq != yigindi:
+            buzilishlar.append(f"Mahsulot #{mahsulot_id}: qoldiq {qoldiq}, harakatlar yig'indisi {yigindi}")
+        if qoldiq is not None and qoldiq < 0:
+            buzilishlar.append(f"Mahsulot #{mahsulot_id}: manfiy qoldiq {qoldiq}")
+
+    oxirgi_qoldiqlar = {}
+    tarix = (
+        # Arxivlashdan keyingi boshlang'ich yozuvlar keyingi yillar yozuvlaridan katta ID oladi, shuning uchun sana
+        MahsulotBalansTarix.objects.order_by('mahsulot_nomi_id', 'sana', 'id')
+        .values_list('id', 'mahsulot_nomi_id', 'amaliyot_turi', 'miqdor', 'qoldiq')
+    )
+    for tarix_id, mahsulot_id, amaliyot_turi, miqdor, qoldiq in tarix.iterator(chunk_size=5000):
+        oldingi = oxirgi_qoldiqlar.get(mahsulot_id, 0)
+        if amaliyot_turi == MahsulotBalansTarix.BOSHLANGICH:
+            kutilgan = qoldiq  # Arxivlangan davrdan o'tkazilgan qoldiq
+        else:
+            kutilgan = oldingi - miqdor if amaliyot_turi == "Chiqdi" else oldingi + miqdor
+        if qoldiq != kutilgan or qoldiq < 0:
+            buzilishlar.append(f"Tarix #{tarix_id} (mahsulot #{mahsulot_id}): qoldiq {qoldiq}, kutilgan {kutilgan}")
+        oxirgi_qoldiqlar[mahsulot_id] = qoldiq
+    for mahsulot_id, qoldiq in oxirgi_qoldiqlar.items():
+        if balanslar.get(mahsulot_id) != qoldiq:
+            buzilishlar.append(
+                f"Mahsulot #{mahsulot_id}: oxirgi tarix qoldig'i {qoldiq}, joriy qoldiq {balanslar.get(mahsulot_id)}")
+    return buzilishlar
+
+
+def foizliklar(qiymatlar):
+    """Kechikish (ms) foizliklari: p50, p90, p99 va eng kattasi."""
+    if len(qiymatlar) < 2:
+        qiymatlar = qiymatlar * 2 or [0]
+    chegaralar = statistics.quantiles(qiymatlar, n=100, method='inclusive')
+    return {"p50": round(chegaralar[49], 2), "p90": round(chegaralar[89], 2), "p99": round(chegaralar[98], 2),
+            "max": round(max(qiymatlar), 2)}
+
+
+class Command(BaseCommand):
+    help = ("Bir nechta jarayon va oqimdan bir vaqtda Kirdi/Chiqdi harakatlarini yozadi: o'tkazuvchanlik va "
+            "kechikish foizliklarini o'lchaydi, so'ng balans invariantlarini tekshiradi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jarayonlar', type=int, default=2, help="Parallel jarayonlar soni")
+        parser.add_argument('--oqimlar', type=int, default=4, help="Har bir jarayondagi oqimlar soni")
+        parser.add_argument('--harakatlar', type=int, default=200, help="Har bir oqim yozadigan harakatlar soni")
+        parser.add_argument('--mahsulotlar', type=int, default=3,
+                            help="Harakatlar taqsimlanadigan mahsulotlar soni (kam bo'lsa raqobat kuchli)")
+        parser.add_argument('--chiqdi-ulushi', type=float, default=0.5, help="Chiqdi harakatlari ulushi")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--json', metavar='FAYL',
+                            help="Natijalarni JSON faylga yozish ('-' - standart chiqishga)")
+        parser.add_argument('--joriy-baza', action='store_true',
+                            help="Vaqtinchalik baza yaratmasdan joriy bazada ishlash: ma'lumotlar qoladi!")
+
+    def handle(self, *args, **options):
+        eski_bazalar = None
+        if not options['joriy_baza']:
+            eski_bazalar = setup_databases(verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS})
+        try:
+            if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+                raise CommandError("Jarayonlar bitta bazaga ulanishi uchun faylga yoziladigan baza kerak.")
+            hisobot = self.stress(options)
+        finally:
+            if eski_bazalar is not None:
+                teardown_databases(eski_bazalar, verbosity=0)
+
+        self.stdout.write(
+            f"{hisobot['yozildi']} yozildi, {hisobot['rad_etildi']} rad etildi, {hisobot['xato']} xato; "
+            f"{hisobot['otkazuvchanlik']} harakat/s"
+        )
+        kechikish = hisobot['kechikish_ms']
+        self.stdout.write(f"Kechikish (ms): p50 {kechikish['p50']}, p90 {kechikish['p90']}, "
+                          f"p99 {kechikish['p99']}, max {kechikish['max']}")
+        if options['json'] == '-':
+            self.stdout.write(json.dumps(hisobot, ensure_ascii=False, indent=2))
+        elif options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as fayl:
+                json.dump(hisobot, fayl, ensure_ascii=False, indent=2)
+
+        if hisobot['buzilishlar']:
+            for buzilish in hisobot['buzilishlar'][:50]:
+                self.stderr.write(buzilish)
+            raise CommandError(f"{len(hisobot['buzilishlar'])} ta invariant buzildi")
+        self.stdout.write(self.style.SUCCESS("Invariantlar: hammasi joyida"))
+
+    def stress(self, options):
+        ombor = SintetikOmbor(birliklar=1, mahsulotlar=options['mahsulotlar'], seed=options['seed'])
+        mahsulot_idlar = [mahsulot.pk for mahsulot in ombor.mahsulotlarni_yaratish()]
+        vazifalar = [
+            (mahsulot_idlar, options['oqimlar'], options['harakatlar'], options['chiqdi_ulushi'],
+             options['seed'] * 100 + jarayon)
+            for jarayon in range(options['jarayonlar'])
+        ]
+
+        # Jarayonlar fork orqali yaratiladi: sozlamalar (vaqtinchalik baza nomi ham) meros qoladi,
+        # ochiq ulanishlar esa meros qolmasligi uchun oldin yopiladi
+        connections.close_all()
+        boshi = time.perf_counter()
+        with multiprocessing.get_context('fork').Pool(options['jarayonlar']) as pool:
+            natijalar = [natija for qism in pool.map(jarayon_ishchisi, vazifalar) for natija in qism]
+        davomiylik = time.perf_counter() - boshi
+
+        holatlar = {holat: 0 for holat in ("yozildi", "rad_etildi", "xato")}
+        for holat, _ in natijalar:
+            holatlar[holat] += 1
+        return {
+            "parametrlar": {nom: options[nom] for nom in (
+                'jarayonlar', 'oqimlar', 'harakatlar', 'mahsulotlar', 'chiqdi_ulushi', 'seed')},
+            "baza": connection.vendor,
+            **holatlar,
+            "davomiylik_s": round(davomiylik, 3),
+            "otkazuvchanlik": round(holatlar["yozildi"] / davomiylik, 1),
+            "kechikish_ms": foizliklar([ms for _, ms in natijalar]),
+            "buzilishlar": invariantlarni_tekshirish(),
+        }
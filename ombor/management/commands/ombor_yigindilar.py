@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ombor.models import (YIGINDI_MODELLARI, HarakatKuni, KirdiChiqdi, MahsulotBalans, MahsulotBalansTarix,
+                          yigindilarni_hisoblash)
+
+
+def harakat_qatorlari(chunk_size):
+    """Barcha harakatlarni yozilish tartibida o'qib, har biridan keyingi qoldiqni hisoblaydi."""
+    qoldiqlar = {}
+    harakatlar = KirdiChiqdi.objects.order_by('id').values_list(
+        'mahsulot_nomi_id', 'sana', 'amaliyot_turi', 'miqdor', 'summa'
+    )
+    for mahsulot_id, sana, amaliyot_turi, miqdor, summa in harakatlar.iterator(chunk_size=chunk_size):
+        ozgarish = -miqdor if amaliyot_turi == "Chiqdi" else miqdor
+        qoldiqlar[mahsulot_id] = qoldiqlar.get(mahsulot_id, 0) + ozgarish
+        yield mahsulot_id, sana, amaliyot_turi, miqdor, summa, qoldiqlar[mahsulot_id]
+
+
+class Command(BaseCommand):
+    help = ("Kunlik va oylik balans yig'indilarini KirdiChiqdi harakatlaridan, harakat kunlarini esa harakatlar "
+            "va balans tarixidan qaytadan quradi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help="Bazadan bir so'rovda o'qiladigan harakatlar soni")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Qayta qurish vaqtida yangi harakat yozilmasligi uchun barcha balanslar qulflanadi
+            MahsulotBalans.objects.hammasini_qulflash()
+
+            for model in YIGINDI_MODELLARI:
+                model.objects.all().delete()
+                yigindilar = yigindilarni_hisoblash(model, harakat_qatorlari(options['chunk_size']))
+                model.objects.bulk_create(yigindilar.values(), batch_size=1000)
+                self.stdout.write(f"{model._meta.verbose_name}: {len(yigindilar)} ta yozuv")
+
+            HarakatKuni.objects.all().delete()
+            for model in (KirdiChiqdi, MahsulotBalansTarix):
+                HarakatKuni.objects.kunlarni_qoshish(
+                    model.objects.values_list('sana', flat=True).iterator(chunk_size=options['chunk_size']), [model]
+                )
+            self.stdout.write(f"{HarakatKuni._meta.verbose_name_plural}: {HarakatKuni.objects.count()} ta yozuv")
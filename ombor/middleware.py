@@ -0,0 +1,109 @@
+import heapq
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import render_to_string
+
+logger = logging.getLogger('ombor.sorovlar')
+
+# Hisobot va admin panelida ko'rsatiladigan eng sekin SQL so'rovlar soni
+ENG_SEKINLAR_SONI = 5
+
+
+class SorovOlchovi:
+    """Bitta HTTP so'rov davomidagi SQL so'rovlar: soni, umumiy vaqti va eng sekinlari."""
+
+    def __init__(self):
+        self.soni = 0
+        self.sql_vaqti = 0.0
+        self.eng_sekinlar = []  # (vaqt, tartib, baza, sql) - kichik uyum
+
+    def __call__(self, execute, sql, params, many, context):
+        boshi = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            vaqt = time.perf_counter() - boshi
+            self.soni += 1
+            self.sql_vaqti += vaqt
+            yozuv = (vaqt, self.soni, context['connection'].alias, sql)
+            if len(self.eng_sekinlar) < ENG_SEKINLAR_SONI:
+                heapq.heappush(self.eng_sekinlar, yozuv)
+            else:
+                heapq.heappushpop(self.eng_sekinlar, yozuv)
+
+    def sekinlar(self):
+        return [
+            {"ms": round(vaqt * 1000, 2), "baza": baza, "sql": sql}
+            for vaqt, _, baza, sql in sorted(self.eng_sekinlar, reverse=True)
+        ]
+
+
+class SorovOlchoviMiddleware:
+    """
+    Har bir so'rov uchun SQL so'rovlar soni va vaqti, eng sekin so'rovlar hamda view vaqtini o'lchaydi.
+
+    Natija `Server-Timing` sarlavhasida (brauzer DevTools) beriladi, xodimlarga admin HTML sahifasi
+    pastida ko'rsatiladi, `SEKIN_SOROV_CHEGARASI` dan sekin so'rovlar `ombor.sorovlar` logiga JSON
+    sifatida yoziladi. Oqimli javob qismlari middleware'dan keyin o'qiladi va o'lchovga kirmaydi.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        olchov = SorovOlchovi()
+        boshi = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(olchov))
+            response = self.get_response(request)
+        jami = time.perf_counter() - boshi
+        view_boshi = getattr(request, '_ombor_view_boshi', None)
+        view = time.perf_counter() - view_boshi if view_boshi is not None else jami
+
+        response['Server-Timing'] = ", ".join([
+            f'sql;dur={olchov.sql_vaqti * 1000:.1f};desc="{olchov.soni} ta SQL"',
+            f'view;dur={view * 1000:.1f}',
+            f'total;dur={jami * 1000:.1f}',
+        ])
+
+        if jami >= settings.SEKIN_SOROV_CHEGARASI:
+            logger.warning(json.dumps({
+                "usul": request.method,
+                "yol": request.get_full_path(),
+                "status": response.status_code,
+                "foydalanuvchi": getattr(getattr(request, 'user', None), 'username', None),
+                "jami_ms": round(jami * 1000, 1),
+                "view_ms": round(view * 1000, 1),
+                "sql_soni": olchov.soni,
+                "sql_ms": round(olchov.sql_vaqti * 1000, 1),
+                "eng_sekin_sql": olchov.sekinlar(),
+            }, ensure_ascii=False))
+
+        if self.korsatish_kerak(request, response):
+            panel = render_to_string("admin/ombor/sorov_olchovi.html", {
+                "jami_ms": jami * 1000, "view_ms": view * 1000, "sql_soni": olchov.soni,
+                "sql_ms": olchov.sql_vaqti * 1000, "eng_sekinlar": olchov.sekinlar(),
+            })
+            response.content = response.content.replace(b"</body>", panel.encode() + b"</body>", 1)
+            if response.has_header('Content-Length'):
+                response['Content-Length'] = len(response.content)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._ombor_view_boshi = time.perf_counter()
+
+    @staticmethod
+    def korsatish_kerak(request, response):
+        user = getattr(request, 'user', None)
+        return (
+            user is not None and user.is_authenticated and user.is_staff
+            and not response.streaming
+            and response.get('Content-Type', '').startswith('text/html')
+            and b"</body>" in response.content
+        )
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 06:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportVazifa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fayl', models.FileField(upload_to='importlar/', verbose_name='Fayl')),
+                ('holat', models.CharField(choices=[('navbatda', 'Navbatda'), ('bajarilmoqda', 'Bajarilmoqda'), ('tayyor', 'Tayyor'), ('xato', 'Xato')], default='navbatda', max_length=15, verbose_name='Holat')),
+                ('jami_qatorlar', models.PositiveIntegerField(blank=True, null=True, verbose_name='Jami qatorlar')),
+                ('qatorlar', models.PositiveIntegerField(default=0, verbose_name='Qayta ishlangan qatorlar')),
+                ('saqlandi', models.PositiveIntegerField(default=0, verbose_name='Saqlangan qatorlar')),
+                ('xato_qatorlar', models.PositiveIntegerField(default=0, verbose_name='Xato qatorlar')),
+                ('xatolar', models.TextField(blank=True, default='', verbose_name='Xatolar')),
+                ('yaratildi', models.DateTimeField(auto_now_add=True, verbose_name='Yuklangan vaqt')),
+                ('boshlandi', models.DateTimeField(blank=True, null=True, verbose_name='Boshlangan vaqt')),
+                ('tugadi', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan vaqt')),
+                ('yaratgan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Yuklagan foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': 'Import Vazifasi',
+                'verbose_name_plural': 'Import Vazifalari',
+            },
+        ),
+    ]
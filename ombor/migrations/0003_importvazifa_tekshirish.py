@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0002_importvazifa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importvazifa',
+            name='faqat_tekshirish',
+            field=models.BooleanField(default=False, verbose_name='Faqat tekshirish'),
+        ),
+        migrations.AddField(
+            model_name='importvazifa',
+            name='xato_hisoboti',
+            field=models.FileField(blank=True, upload_to='import_xatolari/', verbose_name='Xatolar hisoboti'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2 on 2026-10-18 06:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0003_importvazifa_tekshirish'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OylikBalans',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sana', models.DateField(verbose_name='Sana')),
+                ('boshlangich_qoldiq', models.PositiveIntegerField(default=0, verbose_name="Boshlang'ich qoldiq")),
+                ('kirdi', models.PositiveIntegerField(default=0, verbose_name='Kirdi')),
+                ('chiqdi', models.PositiveIntegerField(default=0, verbose_name='Chiqdi')),
+                ('yakuniy_qoldiq', models.PositiveIntegerField(default=0, verbose_name='Yakuniy qoldiq')),
+                ('kirdi_summa', models.DecimalField(decimal_places=2, default=0, max_digits=17, verbose_name='Kirdi summasi')),
+                ('chiqdi_summa', models.DecimalField(decimal_places=2, default=0, max_digits=17, verbose_name='Chiqdi summasi')),
+                ('mahsulot_nomi', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='ombor.mahsulot', verbose_name='Mahsulot nomi')),
+            ],
+            options={
+                'verbose_name': 'Oylik Balans',
+                'verbose_name_plural': 'Oylik Balans',
+            },
+        ),
+        migrations.CreateModel(
+            name='KunlikBalans',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sana', models.DateField(verbose_name='Sana')),
+                ('boshlangich_qoldiq', models.PositiveIntegerField(default=0, verbose_name="Boshlang'ich qoldiq")),
+                ('kirdi', models.PositiveIntegerField(default=0, verbose_name='Kirdi')),
+                ('chiqdi', models.PositiveIntegerField(default=0, verbose_name='Chiqdi')),
+                ('yakuniy_qoldiq', models.PositiveIntegerField(default=0, verbose_name='Yakuniy qoldiq')),
+                ('kirdi_summa', models.DecimalField(decimal_places=2, default=0, max_digits=17, verbose_name='Kirdi summasi')),
+                ('chiqdi_summa', models.DecimalField(decimal_places=2, default=0, max_digits=17, verbose_name='Chiqdi summasi')),
+                ('mahsulot_nomi', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='ombor.mahsulot', verbose_name='Mahsulot nomi')),
+            ],
+            options={
+                'verbose_name': 'Kunlik Balans',
+                'verbose_name_plural': 'Kunlik Balans',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='oylikbalans',
+            constraint=models.UniqueConstraint(fields=('mahsulot_nomi', 'sana'), name='oylik_balans_mahsulot_sana'),
+        ),
+        migrations.AddConstraint(
+            model_name='kunlikbalans',
+            constraint=models.UniqueConstraint(fields=('mahsulot_nomi', 'sana'), name='kunlik_balans_mahsulot_sana'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0004_balans_yigindilari'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarix',
+            index=models.Index(fields=['mahsulot_nomi', 'sana', 'id'], name='tarix_mahsulot_sana'),
+        ),
+    ]
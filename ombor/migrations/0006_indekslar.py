@@ -0,0 +1,82 @@
+# Generated by Django 4.2 on 2026-10-18 06:38
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+
+
+def takroriy_balanslarni_ochirish(apps, schema_editor):
+    """
+    Unikal cheklovdan oldin: bir mahsulotga bir nechta balans bo'lsa, birinchi yaratilgani qoladi.
+    Qaysi qatorning qoldig'i to'g'ri ekani noma'lum, shuning uchun qolgan qatorga harakatlar tarixidagi
+    oxirgi qoldiq, tarix bo'lmasa harakatlar yig'indisi yoziladi.
+    """
+    MahsulotBalans = apps.get_model('ombor', 'MahsulotBalans')
+    MahsulotBalansTarix = apps.get_model('ombor', 'MahsulotBalansTarix')
+    KirdiChiqdi = apps.get_model('ombor', 'KirdiChiqdi')
+    takroriylar = (
+        MahsulotBalans.objects.values('mahsulot_nomi')
+        .annotate(soni=Count('id'), birinchi=Min('id'))
+        .filter(soni__gt=1)
+    )
+    for takroriy in takroriylar:
+        mahsulot_id = takroriy['mahsulot_nomi']
+        qoldiq = (
+            MahsulotBalansTarix.objects.filter(mahsulot_nomi_id=mahsulot_id)
+            .order_by('-id').values_list('qoldiq', flat=True).first()
+        )
+        if qoldiq is None:
+            yigindilar = KirdiChiqdi.objects.filter(mahsulot_nomi_id=mahsulot_id).aggregate(
+                kirdi=Sum('miqdor', filter=Q(amaliyot_turi="Kirdi"), default=0),
+                chiqdi=Sum('miqdor', filter=Q(amaliyot_turi="Chiqdi"), default=0),
+            )
+            qoldiq = max(yigindilar['kirdi'] - yigindilar['chiqdi'], 0)
+        MahsulotBalans.objects.filter(mahsulot_nomi_id=mahsulot_id).exclude(pk=takroriy['birinchi']).delete()
+        MahsulotBalans.objects.filter(pk=takroriy['birinchi']).update(qoldiq=qoldiq)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0005_tarix_mahsulot_sana_indeksi'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mahsulotbalanstarix',
+            name='amaliyot_turi',
+            field=models.CharField(max_length=15, verbose_name='Amaliyot turi'),
+        ),
+        migrations.AddIndex(
+            model_name='kirdichiqdi',
+            index=models.Index(fields=['mahsulot_nomi', 'id'], name='harakat_mahsulot_id'),
+        ),
+        migrations.AddIndex(
+            model_name='kirdichiqdi',
+            index=models.Index(fields=['sana'], name='harakat_sana'),
+        ),
+        migrations.AddIndex(
+            model_name='kirdichiqdi',
+            index=models.Index(fields=['amaliyot_turi', 'sana'], name='harakat_turi_sana'),
+        ),
+        migrations.AddIndex(
+            model_name='kunlikbalans',
+            index=models.Index(fields=['sana'], name='kunlik_balans_sana'),
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarix',
+            index=models.Index(fields=['mahsulot_nomi', 'id'], name='tarix_mahsulot_id'),
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarix',
+            index=models.Index(fields=['sana'], name='tarix_sana'),
+        ),
+        migrations.AddIndex(
+            model_name='oylikbalans',
+            index=models.Index(fields=['sana'], name='oylik_balans_sana'),
+        ),
+        migrations.RunPython(takroriy_balanslarni_ochirish, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mahsulotbalans',
+            constraint=models.UniqueConstraint(fields=('mahsulot_nomi',), name='mahsulot_balans_yagona'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+import re
+
+from django.db import migrations, models
+
+APOSTROFLAR = str.maketrans({belgi: "'" for belgi in "‘’ʻʼ`´"})
+
+
+def nom_kaliti(nom):
+    # models.nom_kaliti nusxasi: migratsiya keyingi o'zgarishlardan mustaqil bo'lishi kerak
+    return re.sub(r'\s+', ' ', nom.translate(APOSTROFLAR).strip()).casefold()
+
+
+def kalitlarni_toldirish(apps, schema_editor):
+    """
+    Mavjud qatorlar uchun kalitni hisoblaydi. Kaliti bir xil chiqqan eski takroriy nomlar
+    (masalan, "Qog'oz" va "qog‘oz") birlashtirilmaydi: keyingilarining kalitiga "#id" qo'shiladi.
+    """
+    for model_nomi, maydon in (('OlchovBirligi', 'olchov_birligi'), ('Mahsulot', 'mahsulot_nomi')):
+        Model = apps.get_model('ombor', model_nomi)
+        band = set()
+        yangilanadiganlar = []
+        for obj in Model.objects.order_by('id').only('id', maydon).iterator(chunk_size=2000):
+            kalit = nom_kaliti(getattr(obj, maydon))
+            obj.kalit = kalit if kalit not in band else f"{kalit}#{obj.pk}"
+            band.add(obj.kalit)
+            yangilanadiganlar.append(obj)
+        Model.objects.bulk_update(yangilanadiganlar, ['kalit'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0006_indekslar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='olchovbirligi',
+            name='kalit',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='mahsulot',
+            name='kalit',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(kalitlarni_toldirish, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='olchovbirligi',
+            name='kalit',
+            field=models.CharField(editable=False, max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='mahsulot',
+            name='kalit',
+            field=models.CharField(editable=False, max_length=255, unique=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0007_nom_kalitlari'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='kirdichiqdi',
+            name='harakat_sana',
+        ),
+        migrations.RemoveIndex(
+            model_name='mahsulotbalanstarix',
+            name='tarix_sana',
+        ),
+        migrations.AddIndex(
+            model_name='kirdichiqdi',
+            index=models.Index(fields=['sana', 'id'], name='harakat_sana_id'),
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarix',
+            index=models.Index(fields=['sana', 'id'], name='tarix_sana_id'),
+        ),
+    ]
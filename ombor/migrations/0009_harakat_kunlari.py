@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0008_sana_id_indekslari'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarakatKuni',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sana', models.DateField(unique=True, verbose_name='Sana')),
+            ],
+            options={
+                'verbose_name': 'Harakat kuni',
+                'verbose_name_plural': 'Harakat kunlari',
+            },
+        ),
+    ]
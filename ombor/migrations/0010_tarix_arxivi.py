@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-18 06:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0009_harakat_kunlari'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MahsulotBalansTarixArxiv',
+            fields=[
+                ('miqdor', models.PositiveIntegerField(verbose_name='Miqdor')),
+                ('qoldiq', models.PositiveIntegerField(verbose_name='Qoldiq')),
+                ('sana', models.DateTimeField(verbose_name='Sana')),
+                ('amaliyot_turi', models.CharField(max_length=15, verbose_name='Amaliyot turi')),
+                ('kimga', models.CharField(blank=True, max_length=255, null=True, verbose_name='Kimga')),
+                ('qayerga', models.CharField(blank=True, max_length=255, null=True, verbose_name='Qayerga')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('mahsulot_nomi', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='ombor.mahsulot', verbose_name='Mahsulot nomi')),
+            ],
+            options={
+                'verbose_name': 'Mahsulot Balans Tarixi (arxiv)',
+                'verbose_name_plural': 'Mahsulot Balans Tarixi (arxiv)',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarixarxiv',
+            index=models.Index(fields=['mahsulot_nomi', 'sana', 'id'], name='arxiv_mahsulot_sana'),
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarixarxiv',
+            index=models.Index(fields=['sana', 'id'], name='arxiv_sana_id'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0010_tarix_arxivi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeshVersiyasi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kalit', models.CharField(max_length=100, unique=True, verbose_name='Kalit')),
+                ('qiymat', models.PositiveBigIntegerField(default=0, verbose_name='Versiya')),
+            ],
+            options={
+                'verbose_name': 'Kesh versiyasi',
+                'verbose_name_plural': 'Kesh versiyalari',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-18 07:40
+
+from django.db import migrations, models
+
+
+def harakat_kunlarini_qayta_qurish(apps, schema_editor):
+    """Kunlar har bir jadval uchun o'z yozuvlaridan: o'chirilgan va arxivlangan kunlar qolmaydi."""
+    HarakatKuni = apps.get_model('ombor', 'HarakatKuni')
+    HarakatKuni.objects.all().delete()
+    for model_nomi in ('KirdiChiqdi', 'MahsulotBalansTarix'):
+        model = apps.get_model('ombor', model_nomi)
+        HarakatKuni.objects.bulk_create(
+            (HarakatKuni(jadval=model._meta.model_name, sana=kun) for kun in model.objects.dates('sana', 'day')),
+            batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0011_kesh_versiyasi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harakatkuni',
+            name='jadval',
+            field=models.CharField(choices=[('kirdichiqdi', 'Kirdi Chiqdi'), ('mahsulotbalanstarix', 'Mahsulot balans tarixi')], default='kirdichiqdi', max_length=30, verbose_name='Jadval'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='harakatkuni',
+            name='sana',
+            field=models.DateField(verbose_name='Sana'),
+        ),
+        migrations.RunPython(harakat_kunlarini_qayta_qurish, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='harakatkuni',
+            constraint=models.UniqueConstraint(fields=('jadval', 'sana'), name='harakat_kuni_yagona'),
+        ),
+    ]
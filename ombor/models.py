@@ -1,12 +1,49 @@
+import functools
+import random
 import re
+import time
 from django import forms
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import OperationalError, connection, models, router, transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from decimal import Decimal
 from django.core.validators import MinValueValidator
 
 
+# Mahsulot va o'lchov birligi nomlari uchun ruxsat etilgan belgilar: harf, raqam, bo'shliq va bir tirnoq
+NOM_REGEX = r"^[a-zA-Zа-яА-ЯёЁ0-9\s']+$"
+
+
+# Bir tirnoq o'rnida yoziladigan belgilar (o‘, oʻ, o’ ...) oddiy "'" ga keltiriladi
+APOSTROFLAR = str.maketrans({belgi: "'" for belgi in "‘’ʻʼ`´"})
+
+
+def nom_kaliti(nom):
+    """
+    Nomning unikal kaliti: bo'shliqlar qisqartirilgan, apostroflar bir xil, katta-kichik harfga bog'liq emas.
+    Takrorlanishni tekshirish va qidirish `__iexact` o'rniga shu kalit ustuni orqali bajariladi.
+    """
+    return re.sub(r'\s+', ' ', nom.translate(APOSTROFLAR).strip()).casefold()
+
+
+def nomni_formatlash(nom):
+    """Ortiqcha bo'shliqlarni olib tashlaydi va har bir so'zning bosh harfini katta qiladi."""
+    def format_word(word):
+        if word.startswith("'"):
+            # Agar so'z bir tirnoq bilan boshlangan bo'lsa, faqat tirnoqdan keyingi qismni katta harf bilan formatlash
+            return "'" + word[1:].capitalize()
+        else:
+            # Oddiy so'zlarni bosh harfni katta qilish
+            return word.capitalize()
+
+    return ' '.join(map(format_word, re.sub(r'\s+', ' ', nom.translate(APOSTROFLAR).strip()).split(' ')))
+
+
 # === Foydalanuvchi Modeli ===
 # Bu model foydalanuvchi uchun rasm o'rnatish uchun kerak
 class CustomUser(AbstractUser):
@@ -24,6 +61,7 @@ class CustomUser(AbstractUser):
 # === O'lchov birligi Modeli ===
 class OlchovBirligi(models.Model):
     olchov_birligi = models.CharField(max_length=255, unique=True, verbose_name="O'lchov birligi")
+    kalit = models.CharField(max_length=255, unique=True, editable=False)  # nom_kaliti(olchov_birligi)
 
     class Meta:
         verbose_name = "O'lchov Birlig"
@@ -32,31 +70,24 @@ class OlchovBirligi(models.Model):
     def clean(self):
         # O'lchov birligidagi ortiqcha bo'shliqlarni olib tashlash
         if self.olchov_birligi:
-            self.olchov_birligi = re.sub(r'\s+', ' ', self.olchov_birligi.strip())
+            self.olchov_birligi = re.sub(r'\s+', ' ', self.olchov_birligi.translate(APOSTROFLAR).strip())
 
         # O'lchov birligi faqat harf, raqam, bo'shliq va bir tirnoqdan iboratligini tekshirish
-        if not re.fullmatch(r"^[a-zA-Zа-яА-ЯёЁ0-9\s']+$", self.olchov_birligi):
+        if not re.fullmatch(NOM_REGEX, self.olchov_birligi):
             raise ValidationError(
                 "O'lchov birligi faqat harflar, raqamlar, bo'shliqlar va bir tirnoqdan iborat bo'lishi kerak! Maxsus belgilar kiritish mumkin emas."
             )
 
         # O'lchov birligini unikal ekanligini tekshirish
-        if OlchovBirligi.objects.filter(olchov_birligi__iexact=self.olchov_birligi).exclude(pk=self.pk).exists():
+        if OlchovBirligi.objects.filter(kalit=nom_kaliti(self.olchov_birligi)).exclude(pk=self.pk).exists():
             raise ValidationError(f"'{self.olchov_birligi}' nomli o'lchov birligi bazada allaqachon mavjud!")
 
     def save(self, *args, **kwargs):
         # O'lchov birligini formatlash: bosh harf faqat so'zlarning boshida bo'lishi kerak
         if self.olchov_birligi:
-            def format_word(word):
-                if word.startswith("'"):
-                    # Agar so'z bir tirnoq bilan boshlangan bo'lsa, faqat tirnoqdan keyingi qismni katta harf bilan formatlash
-                    return "'" + word[1:].capitalize()
-                else:
-                    # Oddiy so'zlarni bosh harfni katta qilish
-                    return word.capitalize()
-
-            self.olchov_birligi = ' '.join(map(format_word, self.olchov_birligi.split(' ')))
+            self.olchov_birligi = nomni_formatlash(self.olchov_birligi)
         self.clean()
+        self.kalit = nom_kaliti(self.olchov_birligi)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -66,6 +97,7 @@ class OlchovBirligi(models.Model):
 # === Mahsulot Modeli ===
 class Mahsulot(models.Model):
     mahsulot_nomi = models.CharField(max_length=255, unique=True, verbose_name="Mahsulot nomi")
+    kalit = models.CharField(max_length=255, unique=True, editable=False)  # nom_kaliti(mahsulot_nomi)
     olchov_birligi = models.ForeignKey('OlchovBirligi', on_delete=models.PROTECT, blank=False, null=False,
                                        verbose_name="O'lchov birligi")
 
@@ -76,16 +108,16 @@ class Mahsulot(models.Model):
     def clean(self):
         # Mahsulot nomidagi ortiqcha bo'shliqlarni olib tashlash
         if self.mahsulot_nomi:
-            self.mahsulot_nomi = re.sub(r'\s+', ' ', self.mahsulot_nomi.strip())
+            self.mahsulot_nomi = re.sub(r'\s+', ' ', self.mahsulot_nomi.translate(APOSTROFLAR).strip())
 
         # Mahsulot nomi faqat harf, raqam, bo'shliq va bir tirnoqdan iboratligini tekshirish
-        if not re.fullmatch(r"^[a-zA-Zа-яА-ЯёЁ0-9\s']+$", self.mahsulot_nomi):
+        if not re.fullmatch(NOM_REGEX, self.mahsulot_nomi):
             raise ValidationError(
                 "Mahsulot nomi faqat harflar, raqamlar, bo'shliqlar va bir tirnoqdan iborat bo'lishi kerak! Maxsus belgilar kiritish mumkin emas."
             )
 
         # Mahsulot nomining unikal ekanligini tekshirish
-        if Mahsulot.objects.filter(mahsulot_nomi__iexact=self.mahsulot_nomi).exclude(pk=self.pk).exists():
+        if Mahsulot.objects.filter(kalit=nom_kaliti(self.mahsulot_nomi)).exclude(pk=self.pk).exists():
             raise ValidationError(f"'{self.mahsulot_nomi}' nomli mahsulot bazada allaqachon mavjud!")
 
         # Mahsulot o'lchov birligi kiritilganligini tekshirish
@@ -103,22 +135,119 @@ class Mahsulot(models.Model):
     def save(self, *args, **kwargs):
         # Mahsulot nomini formatlash: so'zlarning bosh harfi katta
         if self.mahsulot_nomi:
-            def format_word(word):
-                if word.startswith("'"):
-                    # Agar so'z bir tirnoq bilan boshlangan bo'lsa, faqat tirnoqdan keyingi qismni katta harf bilan formatlash
-                    return "'" + word[1:].capitalize()
-                else:
-                    # Oddiy so'zlarni bosh harfni katta qilish
-                    return word.capitalize()
-
-            self.mahsulot_nomi = ' '.join(map(format_word, self.mahsulot_nomi.split(' ')))
+            self.mahsulot_nomi = nomni_formatlash(self.mahsulot_nomi)
         self.clean()
+        self.kalit = nom_kaliti(self.mahsulot_nomi)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.mahsulot_nomi
 
 
+# Joriy qoldiq keshi: har bir mahsulot uchun `MahsulotBalans.qoldiq`. Balansni o'zgartirgan tranzaksiya
+# yakunlanganda yangi qiymat yoziladi, keshda bo'lmasa bazadan o'qiladi. Kesh faqat oldindan tekshiruv va
+# ko'rsatish uchun: yakuniy tekshiruv qulflangan balans qatorida (`qoldiqni_yangilash`, `post_many`).
+QOLDIQ_KESH_KALITI = "ombor:qoldiq:{}"
+QOLDIQ_KESH_MUDDATI = 60 * 60
+
+
+def qoldiq_keshini_yozish(qoldiqlar):
+    """`{mahsulot_id: qoldiq}` ni tranzaksiya yakunlangandan keyin keshga yozadi."""
+    qiymatlar = {QOLDIQ_KESH_KALITI.format(mahsulot_id): qoldiq for mahsulot_id, qoldiq in qoldiqlar.items()}
+    transaction.on_commit(lambda: cache.set_many(qiymatlar, QOLDIQ_KESH_MUDDATI))
+
+
+def qoldiq_keshini_tozalash(mahsulot_id):
+    transaction.on_commit(lambda: cache.delete(QOLDIQ_KESH_KALITI.format(mahsulot_id)))
+
+
+# === Mahsulot Balans Manageri ===
+# Balansni o'zgartirishning yagona yo'li. Tranzaksiya ichida chaqirilishi kerak.
+class MahsulotBalansManager(models.Manager):
+    def joriy_qoldiq(self, mahsulot_id):
+        """Mahsulotning joriy qoldig'i (keshdan), balansi bo'lmasa None."""
+        qoldiq = cache.get(QOLDIQ_KESH_KALITI.format(mahsulot_id))
+        if qoldiq is None:
+            qoldiq = self.bazadagi_qoldiq(mahsulot_id)
+        return qoldiq
+
+    def bazadagi_qoldiq(self, mahsulot_id):
+        """
+        Mahsulotning joriy qoldig'i asosiy bazadan (replika hali yangi harakatlarga yetib kelmagan bo'lishi
+        mumkin), keshga ham yoziladi. Kesh jarayonning o'zida bo'lsa (locmem), boshqa jarayon (import ishchisi,
+        boshqa gunicorn ishchisi) yozgan harakatlar unga tushmaydi: rad etishdan oldin shu qiymat olinadi.
+        """
+        qoldiq = (
+            self.db_manager(router.db_for_write(self.model))
+            .filter(mahsulot_nomi_id=mahsulot_id).values_list('qoldiq', flat=True).first()
+        )
+        if qoldiq is not None:
+            # add(): shu orada tranzaksiya yozgan yangi qiymat eski o'qilgan qiymat bilan almashmaydi
+            kalit = QOLDIQ_KESH_KALITI.format(mahsulot_id)
+            if not cache.add(kalit, qoldiq, QOLDIQ_KESH_MUDDATI) and cache.get(kalit) != qoldiq:
+                # Keshdagi qiymat eskirgan: keyingi o'qish bazadan
+                cache.delete(kalit)
+        return qoldiq
+
+    def qoldiqni_yangilash(self, mahsulot_id, miqdor, amaliyot_turi):
+        """
+        Mahsulot balansini shartli `F()` so'rovi bilan o'zgartiradi va yangi qoldiqni qaytaradi.
+
+        UPDATE birinchi bajariladi, shuning uchun balans qatori tranzaksiya oxirigacha
+        qulflanadi va parallel yozuvlar bir-birining natijasini yo'qotmaydi.
+        """
+        balanslar = self.filter(mahsulot_nomi_id=mahsulot_id)
+
+        if amaliyot_turi == "Chiqdi":
+            # Qoldiq manfiy bo'lib qolmasligi uchun shart UPDATE ichida tekshiriladi
+            if not balanslar.filter(qoldiq__gte=miqdor).update(qoldiq=F('qoldiq') - miqdor):
+                # Oldindan tekshiruv o'tgan bo'lsa, keshdagi qoldiq eskirgan
+                cache.delete(QOLDIQ_KESH_KALITI.format(mahsulot_id))
+                if not balanslar.exists():
+                    raise ValidationError("Bu mahsulot omborda mavjud emas!")
+                raise ValidationError("Omborda yetarli mahsulot mavjud emas!")
+        elif not balanslar.update(qoldiq=F('qoldiq') + miqdor):
+            # Mahsulot birinchi marta kirdi: bir vaqtda ikkita balans yaratilmasligi uchun
+            # mahsulot qatorini qulflab, qayta urinib ko'ramiz
+            Mahsulot.objects.select_for_update().values_list('pk', flat=True).get(pk=mahsulot_id)
+            if not balanslar.update(qoldiq=F('qoldiq') + miqdor):
+                self.create(mahsulot_nomi_id=mahsulot_id, qoldiq=miqdor)
+                qoldiq_keshini_yozish({mahsulot_id: miqdor})
+                return miqdor
+
+        qoldiq = balanslar.values_list('qoldiq', flat=True).get()
+        qoldiq_keshini_yozish({mahsulot_id: qoldiq})
+        return qoldiq
+
+    def qulflash(self, mahsulot_idlar):
+        """Mahsulotlar balansini qulflab, `{mahsulot_id: MahsulotBalans}` lug'atini qaytaradi."""
+        balanslar = self.filter(mahsulot_nomi_id__in=mahsulot_idlar).order_by('mahsulot_nomi_id')
+        if not connection.features.has_select_for_update:
+            # SQLite'da SELECT ... FOR UPDATE yo'q: bo'sh UPDATE yozish qulfini darhol oladi
+            balanslar.update(qoldiq=F('qoldiq'))
+        qulflangan = {balans.mahsulot_nomi_id: balans for balans in balanslar.select_for_update()}
+
+        balanssiz = set(mahsulot_idlar) - set(qulflangan)
+        if balanssiz:
+            # Balansi hali yo'q mahsulotlar uchun qoldiqni_yangilash() kabi mahsulot qatori qulflanadi
+            # (tartib bilan, o'zaro bloklanmaslik uchun). Shu orada boshqa tranzaksiya yaratgan balans ham qulflab o'qiladi.
+            list(Mahsulot.objects.select_for_update().filter(pk__in=balanssiz).order_by('pk').values_list('pk', flat=True))
+            qulflangan.update(
+                (balans.mahsulot_nomi_id, balans)
+                for balans in self.filter(mahsulot_nomi_id__in=balanssiz).order_by('mahsulot_nomi_id').select_for_update()
+            )
+        return qulflangan
+
+    def hammasini_qulflash(self):
+        """Barcha balans va mahsulot qatorlarini qulflaydi: tranzaksiya tugaguncha yangi harakat yozilmaydi."""
+        if not connection.features.has_select_for_update:
+            # SQLite'da yozish qulfi butun bazaga olinadi, bo'sh UPDATE yetarli
+            self.update(qoldiq=F('qoldiq'))
+            return
+        list(self.select_for_update().values_list('pk', flat=True))
+        list(Mahsulot.objects.select_for_update().values_list('pk', flat=True))
+
+
 # === Mahsulot Balans Modeli ===
 # Bu model mahsulotning ombordagi qolgan miqdorini saqlash uchun ishlatiladi.
 class MahsulotBalans(models.Model):
@@ -126,23 +255,64 @@ class MahsulotBalans(models.Model):
                                       verbose_name="Mahsulot nomi")  # Mahsulotga bog'langan
     qoldiq = models.PositiveIntegerField(default=0, verbose_name="Qoldiq")  # Ombordagi qolgan mahsulot miqdori
 
+    objects = MahsulotBalansManager()
+
     class Meta:
         verbose_name = "Mahsulot Joriy Balansi"
         verbose_name_plural = "Mahsulot Joriy Balansi"
+        constraints = [
+            # Har bir mahsulot uchun bitta balans qatori
+            models.UniqueConstraint(fields=['mahsulot_nomi'], name='mahsulot_balans_yagona'),
+        ]
 
     def __str__(self):
         return f"{self.mahsulot_nomi} {self.qoldiq}"  # Admin panelda mahsulot va miqdorini ko'rsatadi
 
 
+# === Mahsulot Balans Tarix Manageri ===
+# O'tgan sanadagi qoldiq: `vaqt` gacha bo'lgan oxirgi tarix yozuvidagi qoldiq.
+# Har ikkala so'rov (mahsulot_nomi, sana, id) indeksidan bitta qidiruv bilan foydalanadi.
+# `arxiv=True` bo'lsa, asosiy jadvalda `vaqt` gacha yozuv bo'lmagan mahsulotlar arxivdan qidiriladi:
+# arxivlangan yozuvlarning barchasi asosiy jadvaldagilardan oldin bo'ladi.
+class MahsulotBalansTarixManager(models.Manager):
+    def _oxirgi_yozuv(self, vaqt):
+        return self.filter(sana__lte=vaqt).order_by('-sana', '-id')
+
+    def qoldiq_sanada(self, mahsulot, vaqt, arxiv=False):
+        """Mahsulotning `vaqt` holatidagi qoldig'i (undan oldin harakat bo'lmagan bo'lsa 0)."""
+        qoldiq = self._oxirgi_yozuv(vaqt).filter(mahsulot_nomi=mahsulot).values_list('qoldiq', flat=True).first()
+        if qoldiq is None and arxiv:
+            return MahsulotBalansTarixArxiv.objects.qoldiq_sanada(mahsulot, vaqt)
+        return qoldiq or 0
+
+    def qoldiqlar_sanada(self, vaqt, arxiv=False):
+        """
+        Barcha mahsulotlarning `vaqt` holatidagi qoldig'i: bitta so'rov, har bir mahsulot uchun
+        indeks bo'yicha oxirgi yozuv olinadi. `qoldiq`, `olchov_birligi__olchov_birligi`
+        tanlangan Mahsulot queryseti qaytaradi.
+        """
+        manbalar = [self] + ([MahsulotBalansTarixArxiv.objects] if arxiv else [])
+        oxirgi_qoldiqlar = [
+            Subquery(manba._oxirgi_yozuv(vaqt).filter(mahsulot_nomi=OuterRef('pk')).values('qoldiq')[:1])
+            for manba in manbalar
+        ]
+        return (
+            Mahsulot.objects
+            .select_related('olchov_birligi')
+            .annotate(qoldiq=Coalesce(*oxirgi_qoldiqlar, Value(0)))
+            .order_by('mahsulot_nomi', 'olchov_birligi__olchov_birligi')
+        )
+
+
 # === Mahsulot Balans Tarix Modeli ===
 # Bu model mahsulot balansi tarixini saqlash uchun ishlatiladi.
-class MahsulotBalansTarix(models.Model):
+class BalansTarixiAsosi(models.Model):
     mahsulot_nomi = models.ForeignKey(Mahsulot, on_delete=models.PROTECT,
                                       verbose_name="Mahsulot nomi")  # Mahsulotga bog'langan
     miqdor = models.PositiveIntegerField(verbose_name="Miqdor")  # Mahsulot miqdori
     qoldiq = models.PositiveIntegerField(verbose_name="Qoldiq")  # Qolgan mahsulot miqdori
     sana = models.DateTimeField(verbose_name="Sana")  # O'zgarish sanasi
-    amaliyot_turi = models.CharField(max_length=5,
+    amaliyot_turi = models.CharField(max_length=15,
                                      verbose_name="Amaliyot turi")  # Operatsiya turi ("Kirdi" yoki "Chiqdi")
 
     kimga = models.CharField(
@@ -158,27 +328,418 @@ class MahsulotBalansTarix(models.Model):
         verbose_name="Qayerga"
     )
 
+    objects = MahsulotBalansTarixManager()
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.mahsulot_nomi} {self.miqdor} {self.qoldiq}  {self.sana} {self.amaliyot_turi}"
+
+
+class MahsulotBalansTarix(BalansTarixiAsosi):
+    # Arxivlangan davr o'rnida qoladigan yozuv: davr oxiridagi qoldiq keyingi davrga o'tkaziladi
+    BOSHLANGICH = "Boshlang'ich"
+
     class Meta:
         verbose_name = "Mahsulot Balans Tarixi"
         verbose_name_plural = "Mahsulot Balans Tarixi"
+        indexes = [
+            # O'tgan sanadagi qoldiq: mahsulot bo'yicha `sana` gacha bo'lgan oxirgi yozuv
+            models.Index(fields=['mahsulot_nomi', 'sana', 'id'], name='tarix_mahsulot_sana'),
+            # Mahsulot tarixi yozilish tartibida
+            models.Index(fields=['mahsulot_nomi', 'id'], name='tarix_mahsulot_id'),
+            # Admin: date_hierarchy, sana oralig'i filtri va `(sana, id)` bo'yicha kalitli sahifalash
+            models.Index(fields=['sana', 'id'], name='tarix_sana_id'),
+        ]
 
-    def save(self, *args, **kwargs):
-        # Asl save metodini chaqirish
-        super().save(*args, **kwargs)
 
-        # MahsulotBalans modelini yangilash
-        if self.mahsulot_nomi:
-            # Mahsulot uchun MahsulotBalans ma'lumotini olish yoki yaratish
-            mahsulot_balans, yaratilgan = MahsulotBalans.objects.get_or_create(
-                mahsulot_nomi=self.mahsulot_nomi,
-                defaults={'qoldiq': self.qoldiq}
+# === Mahsulot Balans Tarixi Arxivi ===
+# Yopilgan yillarning tarix yozuvlari `ombor_arxivlash` buyrug'i bilan shu jadvalga ko'chiriladi.
+class MahsulotBalansTarixArxiv(BalansTarixiAsosi):
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")  # Asosiy jadvaldagi ID saqlanadi
+
+    class Meta:
+        verbose_name = "Mahsulot Balans Tarixi (arxiv)"
+        verbose_name_plural = "Mahsulot Balans Tarixi (arxiv)"
+        indexes = [
+            models.Index(fields=['mahsulot_nomi', 'sana', 'id'], name='arxiv_mahsulot_sana'),
+            models.Index(fields=['sana', 'id'], name='arxiv_sana_id'),
+        ]
+
+
+# === Balans yig'indilari (kunlik va oylik) ===
+# Hisobotlar harakatlarni emas, mahsulot × davr bo'yicha tayyor yig'indilarni o'qiydi.
+# Yig'indilar harakat yozilgan tranzaksiya ichida yangilanadi.
+def yigindilarni_hisoblash(model, qatorlar):
+    """
+    Harakatlarni `(mahsulot_id, davr)` bo'yicha guruhlab, saqlanmagan yig'indi obyektlarini qaytaradi.
+
+    `qatorlar` - `(mahsulot_id, sana, amaliyot_turi, miqdor, summa, qoldiq)`, bu yerda `qoldiq`
+    harakatdan keyingi qoldiq. Qatorlar yozilish tartibida kelishi kerak.
+    """
+    yigindilar = {}
+    for mahsulot_id, sana, amaliyot_turi, miqdor, summa, qoldiq in qatorlar:
+        kalit = (mahsulot_id, model.davr_boshi(sana))
+        yigindi = yigindilar.get(kalit)
+        if yigindi is None:
+            oldingi_qoldiq = qoldiq + miqdor if amaliyot_turi == "Chiqdi" else qoldiq - miqdor
+            yigindi = yigindilar[kalit] = model(
+                mahsulot_nomi_id=mahsulot_id, sana=kalit[1], boshlangich_qoldiq=oldingi_qoldiq
             )
-            # Oxirgi qolgan miqdorni yangilash
-            mahsulot_balans.qoldiq = self.qoldiq
-            mahsulot_balans.save()
+        if amaliyot_turi == "Chiqdi":
+            yigindi.chiqdi += miqdor
+            yigindi.chiqdi_summa += summa
+        else:
+            yigindi.kirdi += miqdor
+            yigindi.kirdi_summa += summa
+        yigindi.yakuniy_qoldiq = qoldiq
+    return yigindilar
+
+
+class BalansYigindisiManager(models.Manager):
+    def harakatlarni_qoshish(self, qatorlar):
+        """
+        Yangi harakatlarni yig'indilarga qo'shadi. Balans qatorlari qulflangan tranzaksiya ichida chaqiriladi,
+        shuning uchun bir mahsulotning yig'indisini bir vaqtda faqat bitta tranzaksiya o'zgartiradi.
+        """
+        yigindilar = yigindilarni_hisoblash(self.model, qatorlar)
+
+        if len(yigindilar) == 1:
+            # Bitta harakat (save()) uchun: odatda bitta UPDATE yetarli
+            (mahsulot_id, sana), yigindi = yigindilar.popitem()
+            if not self.filter(mahsulot_nomi_id=mahsulot_id, sana=sana).update(
+                    kirdi=F('kirdi') + yigindi.kirdi,
+                    chiqdi=F('chiqdi') + yigindi.chiqdi,
+                    kirdi_summa=F('kirdi_summa') + yigindi.kirdi_summa,
+                    chiqdi_summa=F('chiqdi_summa') + yigindi.chiqdi_summa,
+                    yakuniy_qoldiq=yigindi.yakuniy_qoldiq
+            ):
+                yigindi.save()
+            return
+
+        mavjudlar = self.filter(
+            mahsulot_nomi_id__in={mahsulot_id for mahsulot_id, _ in yigindilar},
+            sana__in={sana for _, sana in yigindilar}
+        )
+        yangilanadiganlar = []
+        for mavjud in mavjudlar:
+            yigindi = yigindilar.pop((mavjud.mahsulot_nomi_id, mavjud.sana), None)
+            if yigindi is None:
+                continue
+            mavjud.kirdi += yigindi.kirdi
+            mavjud.chiqdi += yigindi.chiqdi
+            mavjud.kirdi_summa += yigindi.kirdi_summa
+            mavjud.chiqdi_summa += yigindi.chiqdi_summa
+            mavjud.yakuniy_qoldiq = yigindi.yakuniy_qoldiq
+            yangilanadiganlar.append(mavjud)
+        self.bulk_update(
+            yangilanadiganlar, ['kirdi', 'chiqdi', 'kirdi_summa', 'chiqdi_summa', 'yakuniy_qoldiq'], batch_size=500
+        )
+        self.bulk_create(yigindilar.values(), batch_size=500)
+
+
+class BalansYigindisi(models.Model):
+    mahsulot_nomi = models.ForeignKey(Mahsulot, on_delete=models.PROTECT, verbose_name="Mahsulot nomi")
+    sana = models.DateField(verbose_name="Sana")  # Davrning birinchi kuni
+    boshlangich_qoldiq = models.PositiveIntegerField(default=0, verbose_name="Boshlang'ich qoldiq")
+    kirdi = models.PositiveIntegerField(default=0, verbose_name="Kirdi")
+    chiqdi = models.PositiveIntegerField(default=0, verbose_name="Chiqdi")
+    yakuniy_qoldiq = models.PositiveIntegerField(default=0, verbose_name="Yakuniy qoldiq")
+    kirdi_summa = models.DecimalField(max_digits=17, decimal_places=2, default=0, verbose_name="Kirdi summasi")
+    chiqdi_summa = models.DecimalField(max_digits=17, decimal_places=2, default=0, verbose_name="Chiqdi summasi")
+
+    objects = BalansYigindisiManager()
+
+    davr = None  # Voris modellarda: 'day' yoki 'month'
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def davr_boshi(cls, sana):
+        """Harakat vaqtiga mos davrning birinchi kuni (mahalliy vaqt bo'yicha)."""
+        kun = timezone.localdate(sana)
+        return kun.replace(day=1) if cls.davr == 'month' else kun
 
     def __str__(self):
-        return f"{self.mahsulot_nomi} {self.miqdor} {self.qoldiq}  {self.sana} {self.amaliyot_turi}"
+        return f"{self.mahsulot_nomi} {self.sana} {self.boshlangich_qoldiq} -> {self.yakuniy_qoldiq}"
+
+
+class KunlikBalans(BalansYigindisi):
+    davr = 'day'
+
+    class Meta:
+        verbose_name = "Kunlik Balans"
+        verbose_name_plural = "Kunlik Balans"
+        constraints = [
+            models.UniqueConstraint(fields=['mahsulot_nomi', 'sana'], name='kunlik_balans_mahsulot_sana'),
+        ]
+        indexes = [
+            models.Index(fields=['sana'], name='kunlik_balans_sana'),
+        ]
+
+
+class OylikBalans(BalansYigindisi):
+    davr = 'month'
+
+    class Meta:
+        verbose_name = "Oylik Balans"
+        verbose_name_plural = "Oylik Balans"
+        constraints = [
+            models.UniqueConstraint(fields=['mahsulot_nomi', 'sana'], name='oylik_balans_mahsulot_sana'),
+        ]
+        indexes = [
+            models.Index(fields=['sana'], name='oylik_balans_sana'),
+        ]
+
+
+YIGINDI_MODELLARI = (KunlikBalans, OylikBalans)
+
+
+class HarakatKuniManager(models.Manager):
+    def kunlar(self, model):
+        return self.filter(jadval=model._meta.model_name)
+
+    def kunlarni_qoshish(self, sanalar, modellar=None):
+        """
+        Yozuv vaqtlariga mos kunlarni (mahalliy vaqt bo'yicha) `modellar` jadvallari uchun qo'shadi, mavjud
+        kunlar o'zgarmaydi. `modellar` berilmasa harakat va tarix uchun: yangi harakat ikkalasiga yoziladi.
+        """
+        modellar = modellar or (KirdiChiqdi, MahsulotBalansTarix)
+        kunlar = {timezone.localdate(sana) for sana in sanalar}
+        self.bulk_create(
+            [self.model(jadval=model._meta.model_name, sana=kun) for model in modellar for kun in kunlar],
+            ignore_conflicts=True
+        )
+
+    def kunlarni_tozalash(self, model, kunlar):
+        """`model` jadvalida yozuvi qolmagan kunlarni (o'chirish yoki arxivlashdan keyin) olib tashlaydi."""
+        kunlar = set(kunlar)
+        if not kunlar:
+            return
+        qolganlar = set(model.objects.filter(sana__date__in=kunlar).dates('sana', 'day'))
+        self.kunlar(model).filter(sana__in=kunlar - qolganlar).delete()
+
+
+class HarakatKuni(models.Model):
+    """
+    Harakatlar va balans tarixi jadvallarida kamida bitta yozuv bo'lgan kunlar. Admin `date_hierarchy`
+    navigatsiyasi butun jadval o'rniga shu kichik jadvaldan quriladi. Tarix arxivlanadi, harakatlar esa
+    yo'q, shuning uchun har bir jadvalning kunlari alohida.
+    """
+    JADVALLAR = (
+        ("kirdichiqdi", "Kirdi Chiqdi"),
+        ("mahsulotbalanstarix", "Mahsulot balans tarixi"),
+    )
+    jadval = models.CharField(max_length=30, choices=JADVALLAR, verbose_name="Jadval")
+    sana = models.DateField(verbose_name="Sana")
+
+    objects = HarakatKuniManager()
+
+    class Meta:
+        verbose_name = "Harakat kuni"
+        verbose_name_plural = "Harakat kunlari"
+        constraints = [
+            models.UniqueConstraint(fields=['jadval', 'sana'], name='harakat_kuni_yagona'),
+        ]
+
+    def __str__(self):
+        return str(self.sana)
+
+
+# SQLite bitta yozuvchiga ruxsat beradi: busy_timeout tugasa yoki o'qigan tranzaksiya yozishga o'tolmasa
+# "database is locked" xatosi chiqadi. Bunday tranzaksiya bekor qilingan, uni boshidan qaytarish xavfsiz.
+def baza_band(xato):
+    return connection.vendor == 'sqlite' and str(xato).startswith(("database is locked", "database table is locked"))
+
+
+def band_bolsa_qaytarish(funksiya):
+    """
+    `funksiya` ni baza band bo'lganda (SQLite) `SQLITE_QAYTA_URINISHLAR` martagacha, oraliqni oshirib
+    qaytadan chaqiradi. Tashqi tranzaksiya ichida qaytarilmaydi: u allaqachon bekor qilingan bo'ladi.
+    """
+    @functools.wraps(funksiya)
+    def orab_olingan(*args, **kwargs):
+        urinishlar = settings.SQLITE_QAYTA_URINISHLAR
+        for urinish in range(urinishlar + 1):
+            try:
+                return funksiya(*args, **kwargs)
+            except OperationalError as e:
+                if urinish == urinishlar or not baza_band(e) or connection.in_atomic_block:
+                    raise
+            # Bir vaqtda band bo'lgan yozuvchilar bir xil paytda qaytmasligi uchun tasodifiy kutish
+            time.sleep(random.uniform(0, min(0.05 * 2 ** urinish, 1)))
+    return orab_olingan
+
+
+# === KirdiChiqdi Manageri ===
+# Harakatlarda ishlatilgan o'lchov birliklari keshi. Kalit bazadan o'qiladigan oxirgi harakat ID si va
+# versiyaga bog'langan: yangi harakat (`post_many` ham) ID ni, mavjud harakat, mahsulot yoki o'lchov
+# birligi o'zgarishi esa versiyani (signal orqali) o'zgartiradi.
+OLCHOV_BIRLIKLARI_KESH_KALITI = "ombor:ishlatilgan_olchov_birliklari:{}-{}"
+OLCHOV_BIRLIKLARI_KESH_MUDDATI = 60 * 60
+OLCHOV_BIRLIKLARI_VERSIYA_KALITI = "olchov_birliklari"
+
+
+class KeshVersiyasiManager(models.Manager):
+    def versiya(self, kalit):
+        return self.filter(kalit=kalit).values_list('qiymat', flat=True).first() or 0
+
+    def oshirish(self, kalit):
+        """Versiyani joriy tranzaksiya ichida oshiradi: o'zgarish bekor qilinsa, versiya ham o'zgarmaydi."""
+        if not self.filter(kalit=kalit).update(qiymat=F('qiymat') + 1):
+            _, yaratildi = self.get_or_create(kalit=kalit, defaults={'qiymat': 1})
+            if not yaratildi:
+                self.filter(kalit=kalit).update(qiymat=F('qiymat') + 1)
+
+
+class KeshVersiyasi(models.Model):
+    """
+    Keshlangan ma'lumotlar versiyasi. Kesh jarayonning o'zida bo'lishi mumkin (locmem), shuning uchun
+    versiya bazada saqlanadi: boshqa jarayon (import ishchisi, boshqa worker) yozgan o'zgarish ham ko'rinadi.
+    """
+    kalit = models.CharField(max_length=100, unique=True, verbose_name="Kalit")
+    qiymat = models.PositiveBigIntegerField(default=0, verbose_name="Versiya")
+
+    objects = KeshVersiyasiManager()
+
+    class Meta:
+        verbose_name = "Kesh versiyasi"
+        verbose_name_plural = "Kesh versiyalari"
+
+    def __str__(self):
+        return f"{self.kalit}: {self.qiymat}"
+
+
+def olchov_birliklari_versiyasini_yangilash():
+    KeshVersiyasi.objects.oshirish(OLCHOV_BIRLIKLARI_VERSIYA_KALITI)
+
+
+# JSON API javoblari versiyasi. Yangi harakat oxirgi harakat ID sini o'zgartiradi; mavjud harakat,
+# mahsulot yoki o'lchov birligi o'zgarganda esa versiya yangilanadi (ETag va kesh kaliti shunga bog'liq).
+API_VERSIYA_KALITI = "api"
+
+
+def api_versiyasi():
+    return KeshVersiyasi.objects.versiya(API_VERSIYA_KALITI)
+
+
+def api_versiyasini_yangilash():
+    KeshVersiyasi.objects.oshirish(API_VERSIYA_KALITI)
+
+
+class KirdiChiqdiManager(models.Manager):
+    def ishlatilgan_olchov_birliklari(self):
+        """
+        Harakatlarda ishlatilgan o'lchov birliklari: `(id, nomi)` ro'yxati, nom bo'yicha tartiblangan.
+        Har safar versiya va oxirgi harakat ID si bitta so'rov bilan o'qiladi, butun jadval bo'yicha
+        DISTINCT so'rov esa faqat shu holat uchun kesh bo'sh bo'lganda bajariladi.
+        """
+        versiya = Subquery(KeshVersiyasi.objects.filter(kalit=OLCHOV_BIRLIKLARI_VERSIYA_KALITI).values('qiymat')[:1])
+        holat = self.order_by('-id').values_list('id', versiya).first()
+        if holat is None:
+            return []  # Harakat yo'q
+        kalit = OLCHOV_BIRLIKLARI_KESH_KALITI.format(*holat)
+        birliklar = cache.get(kalit)
+        if birliklar is None:
+            birliklar = list(
+                self.values_list('mahsulot_nomi__olchov_birligi__id', 'mahsulot_nomi__olchov_birligi__olchov_birligi')
+                .distinct()
+                .order_by('mahsulot_nomi__olchov_birligi__olchov_birligi')
+            )
+            cache.set(kalit, birliklar, OLCHOV_BIRLIKLARI_KESH_MUDDATI)
+        return birliklar
+
+    def post_many(self, harakatlar, batch_size=500):
+        """
+        Ko'p harakatni bitta tranzaksiyada yozadi.
+
+        Balanslar bitta so'rovda qulflab olinadi, qoldiqlar ketma-ketligi xotirada hisoblanadi,
+        harakatlar va tarix `bulk_create`, balanslar esa bitta `bulk_update` bilan yoziladi.
+        Biror mahsulot qoldig'i manfiy bo'lib qolsa, butun to'plam rad etiladi.
+        """
+        harakatlar = list(harakatlar)
+        if not harakatlar:
+            return harakatlar
+
+        for harakat in harakatlar:
+            harakat.maydonlarni_tekshirish()
+
+        band_bolsa_qaytarish(self._harakatlarni_yozish)(harakatlar, batch_size)
+        return harakatlar
+
+    def _harakatlarni_yozish(self, harakatlar, batch_size):
+        for harakat in harakatlar:
+            # Qayta urinishda bekor qilingan bulk_create bergan ID lar tashlab yuboriladi
+            harakat.pk, harakat._state.adding = None, True
+
+        with transaction.atomic():
+            balanslar = MahsulotBalans.objects.qulflash({harakat.mahsulot_nomi_id for harakat in harakatlar})
+            qoldiqlar = {mahsulot_id: balans.qoldiq for mahsulot_id, balans in balanslar.items()}
+
+            # Har bir harakatdan keyingi qoldiq (tarix yozuvlari uchun)
+            harakat_qoldiqlari = []
+            for tartib, harakat in enumerate(harakatlar, start=1):
+                mahsulot_id = harakat.mahsulot_nomi_id
+                if harakat.amaliyot_turi == "Chiqdi":
+                    if mahsulot_id not in qoldiqlar:
+                        raise ValidationError(f"{tartib}-harakat: Bu mahsulot omborda mavjud emas!")
+                    if harakat.miqdor > qoldiqlar[mahsulot_id]:
+                        cache.delete(QOLDIQ_KESH_KALITI.format(mahsulot_id))
+                        raise ValidationError(f"{tartib}-harakat: Omborda yetarli mahsulot mavjud emas!")
+                    qoldiqlar[mahsulot_id] -= harakat.miqdor
+                else:
+                    qoldiqlar[mahsulot_id] = qoldiqlar.get(mahsulot_id, 0) + harakat.miqdor
+                harakat_qoldiqlari.append(qoldiqlar[mahsulot_id])
+
+            # `sana` (auto_now_add) bulk_create vaqtida obyektlarga yoziladi
+            self.bulk_create(harakatlar, batch_size=batch_size)
+            MahsulotBalansTarix.objects.bulk_create(
+                [
+                    MahsulotBalansTarix(
+                        mahsulot_nomi_id=harakat.mahsulot_nomi_id,
+                        miqdor=harakat.miqdor,
+                        qoldiq=qoldiq,
+                        sana=harakat.sana,
+                        amaliyot_turi=harakat.amaliyot_turi,
+                        kimga=harakat.kimga,
+                        qayerga=harakat.qayerga
+                    )
+                    for harakat, qoldiq in zip(harakatlar, harakat_qoldiqlari)
+                ],
+                batch_size=batch_size
+            )
+
+            for mahsulot_id, balans in balanslar.items():
+                balans.qoldiq = qoldiqlar[mahsulot_id]
+            MahsulotBalans.objects.bulk_update(balanslar.values(), ['qoldiq'])
+            MahsulotBalans.objects.bulk_create(
+                MahsulotBalans(mahsulot_nomi_id=mahsulot_id, qoldiq=qoldiq)
+                for mahsulot_id, qoldiq in qoldiqlar.items() if mahsulot_id not in balanslar
+            )
+            yigindi_qatorlari = [
+                harakat.yigindi_qatori(qoldiq) for harakat, qoldiq in zip(harakatlar, harakat_qoldiqlari)
+            ]
+            for model in YIGINDI_MODELLARI:
+                model.objects.harakatlarni_qoshish(yigindi_qatorlari)
+            HarakatKuni.objects.kunlarni_qoshish(harakat.sana for harakat in harakatlar)
+            qoldiq_keshini_yozish(qoldiqlar)
+
+    def oylik_chiqim(self, boshi, oxiri, mahsulotlar=None):
+        """
+        `[boshi, oxiri)` oralig'ida berilgan (Chiqdi) mahsulotlar: mahsulot va o'lchov birligi bo'yicha
+        jami miqdor va summa. Natija bitta GROUP BY so'rovi bilan olinadi.
+        """
+        queryset = self.filter(amaliyot_turi="Chiqdi", sana__gte=boshi, sana__lt=oxiri)
+        if mahsulotlar is not None:
+            queryset = queryset.filter(mahsulot_nomi__in=mahsulotlar)
+        return (
+            queryset
+            .values('mahsulot_nomi__mahsulot_nomi', 'mahsulot_nomi__olchov_birligi__olchov_birligi')
+            .annotate(jami_miqdor=Sum('miqdor'), jami_summa=Sum('summa'))
+            .order_by('mahsulot_nomi__mahsulot_nomi', 'mahsulot_nomi__olchov_birligi__olchov_birligi')
+        )
 
 
 class KirdiChiqdi(models.Model):
@@ -213,9 +774,19 @@ class KirdiChiqdi(models.Model):
         verbose_name="Qayerga"
     )
 
+    objects = KirdiChiqdiManager()
+
     class Meta:
         verbose_name = "Kirdi Chiqdi"
         verbose_name_plural = "Kirdi Chiqdi"
+        indexes = [
+            # Mahsulot bo'yicha eksport va harakatlar tarixi (ORDER BY id)
+            models.Index(fields=['mahsulot_nomi', 'id'], name='harakat_mahsulot_id'),
+            # Admin: ordering = ('-sana', '-id'), date_hierarchy, kalitli sahifalash
+            models.Index(fields=['sana', 'id'], name='harakat_sana_id'),
+            # Amaliyot turi filtri va oylik hisobot (Chiqdi + sana oralig'i)
+            models.Index(fields=['amaliyot_turi', 'sana'], name='harakat_turi_sana'),
+        ]
 
     def formatted_summa(self):
         """Summa ustunini formatlash."""
@@ -224,7 +795,22 @@ class KirdiChiqdi(models.Model):
     formatted_summa.short_description = "Formatlangan summa"
 
     def clean(self):
+        self.maydonlarni_tekshirish()
+
+        # Ombordagi balansni tekshirish. Bu forma uchun oldindan ogohlantirish,
+        # yakuniy tekshiruv save() ichida qulflangan balans qatorida bajariladi.
+        if self.amaliyot_turi == "Chiqdi" and self._state.adding:
+            qoldiq = MahsulotBalans.objects.joriy_qoldiq(self.mahsulot_nomi_id)
+            if qoldiq is None or self.miqdor > qoldiq:
+                # Kesh faqat tez qabul qilish uchun: rad etishdan oldin qoldiq bazadan qayta o'qiladi
+                qoldiq = MahsulotBalans.objects.bazadagi_qoldiq(self.mahsulot_nomi_id)
+            if qoldiq is None:
+                raise ValidationError("Bu mahsulot omborda mavjud emas!")
+            if self.miqdor > qoldiq:
+                raise ValidationError("Omborda yetarli mahsulot mavjud emas!")
 
+    def maydonlarni_tekshirish(self):
+        """Bazaga murojaat qilmaydigan maydon tekshiruvlari va formatlash."""
         # `summa` validatsiyasi
         if not isinstance(self.summa, (int, float, Decimal)):
             raise ValidationError({"summa": "Summa faqat son bo'lishi kerak."})
@@ -257,57 +843,95 @@ class KirdiChiqdi(models.Model):
             if self.qayerga:
                 raise ValidationError({"qayerga": "Kirdi operatsiyasi uchun 'Qayerga' maydoni kiritilishi  emas!"})
 
-        # Ombordagi balansni tekshirish
-        if self.amaliyot_turi == "Chiqdi":
-            mahsulot_balans = MahsulotBalans.objects.filter(mahsulot_nomi=self.mahsulot_nomi).first()
-            if not mahsulot_balans:
-                raise ValidationError("Bu mahsulot omborda mavjud emas!")
-            if self.miqdor > mahsulot_balans.qoldiq:
-                raise ValidationError("Omborda yetarli mahsulot mavjud emas!")
-
     def save(self, *args, **kwargs):
-        # Avval clean() chaqiriladi
-        self.clean()
-        super().save(*args, **kwargs)
-        # MahsulotBalansTarix uchun yozuv qo'shish yoki yangilash
-        if self.mahsulot_nomi:
-            mahsulot_tarix = MahsulotBalansTarix.objects.filter(mahsulot_nomi=self.mahsulot_nomi).last()
-
-            if mahsulot_tarix is None:
-                # Mahsulot uchun tarix mavjud bo'lmasa, yangi yozuv yaratish
-                MahsulotBalansTarix.objects.create(
-                    mahsulot_nomi=self.mahsulot_nomi,
-                    miqdor=self.miqdor,
-                    qoldiq=self.miqdor,
-                    sana=self.sana,
-                    amaliyot_turi="Kirdi" if self.amaliyot_turi == "Kirdi" else "Chiqdi",
-                    kimga=self.kimga,
-                    qayerga=self.qayerga
-                )
-            else:
-                # Ombor balansini yangilash
-                if self.amaliyot_turi == "Kirdi":
-                    yangi_qoldiq = mahsulot_tarix.qoldiq + self.miqdor
-                elif self.amaliyot_turi == "Chiqdi":
-                    yangi_qoldiq = mahsulot_tarix.qoldiq - self.miqdor
-                    if yangi_qoldiq < 0:
-                        raise ValidationError("Omborda mahsulot yetarli emas.")
-
-                # Yangi tarix yozuvini qo'shish
-                MahsulotBalansTarix.objects.create(
-                    mahsulot_nomi=self.mahsulot_nomi,
-                    miqdor=self.miqdor,
-                    qoldiq=yangi_qoldiq,
-                    sana=self.sana,
-                    amaliyot_turi="Kirdi" if self.amaliyot_turi == "Kirdi" else "Chiqdi",
-                    kimga=self.kimga,
-                    qayerga=self.qayerga
-                )
+        # Balans tekshiruvi quyida UPDATE shartida bajariladi, shuning uchun bu yerda faqat maydonlar
+        self.maydonlarni_tekshirish()
+
+        if not self._state.adding:
+            # Mavjud harakatni qayta saqlash balansni ikkinchi marta o'zgartirmasligi kerak
+            super().save(*args, **kwargs)
+            return
+
+        band_bolsa_qaytarish(self._yangi_harakatni_yozish)(self.pk, *args, **kwargs)
+
+    def _yangi_harakatni_yozish(self, pk, *args, **kwargs):
+        # Qayta urinishda bekor qilingan INSERT bergan ID va holat tiklanadi
+        self.pk, self._state.adding = pk, True
+
+        with transaction.atomic():
+            # 1) Balansni qulflab yangilash, 2) harakatni yozish, 3) tarix yozuvini qo'shish
+            yangi_qoldiq = MahsulotBalans.objects.qoldiqni_yangilash(
+                self.mahsulot_nomi_id, self.miqdor, self.amaliyot_turi
+            )
+            super().save(*args, **kwargs)
+            MahsulotBalansTarix.objects.create(
+                mahsulot_nomi_id=self.mahsulot_nomi_id,
+                miqdor=self.miqdor,
+                qoldiq=yangi_qoldiq,
+                sana=self.sana,
+                amaliyot_turi=self.amaliyot_turi,
+                kimga=self.kimga,
+                qayerga=self.qayerga
+            )
+            for model in YIGINDI_MODELLARI:
+                model.objects.harakatlarni_qoshish([self.yigindi_qatori(yangi_qoldiq)])
+            HarakatKuni.objects.kunlarni_qoshish([self.sana])
+
+    def yigindi_qatori(self, qoldiq):
+        """Kunlik/oylik yig'indilar uchun harakat ma'lumoti (`yigindilarni_hisoblash` ga qarang)."""
+        return self.mahsulot_nomi_id, self.sana, self.amaliyot_turi, self.miqdor, Decimal(str(self.summa)), qoldiq
 
     def __str__(self):
         return f"{self.mahsulot_nomi} {self.miqdor} {self.sana} {self.amaliyot_turi}"
 
 
+# === Import Vazifasi Modeli ===
+# Katta Excel fayllar HTTP so'rovi ichida emas, `ombor_import_worker` buyrug'i orqali import qilinadi.
+class ImportVazifa(models.Model):
+    NAVBATDA = "navbatda"
+    BAJARILMOQDA = "bajarilmoqda"
+    TAYYOR = "tayyor"
+    XATO = "xato"
+    Holatlar = (
+        (NAVBATDA, "Navbatda"),
+        (BAJARILMOQDA, "Bajarilmoqda"),
+        (TAYYOR, "Tayyor"),
+        (XATO, "Xato"),
+    )
+
+    fayl = models.FileField(upload_to='importlar/', verbose_name="Fayl")
+    holat = models.CharField(max_length=15, choices=Holatlar, default=NAVBATDA, verbose_name="Holat")
+    faqat_tekshirish = models.BooleanField(default=False,
+                                           verbose_name="Faqat tekshirish")  # Bazaga hech narsa yozilmaydi
+    jami_qatorlar = models.PositiveIntegerField(blank=True, null=True,
+                                                verbose_name="Jami qatorlar")  # Fayl o'lchamidan taxminiy
+    qatorlar = models.PositiveIntegerField(default=0, verbose_name="Qayta ishlangan qatorlar")
+    saqlandi = models.PositiveIntegerField(default=0, verbose_name="Saqlangan qatorlar")
+    xato_qatorlar = models.PositiveIntegerField(default=0, verbose_name="Xato qatorlar")
+    xatolar = models.TextField(blank=True, default="", verbose_name="Xatolar")
+    xato_hisoboti = models.FileField(upload_to='import_xatolari/', blank=True,
+                                     verbose_name="Xatolar hisoboti")  # Xato qatorlar XLSX fayli
+    yaratgan = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True,
+                                 verbose_name="Yuklagan foydalanuvchi")
+    yaratildi = models.DateTimeField(auto_now_add=True, verbose_name="Yuklangan vaqt")
+    boshlandi = models.DateTimeField(blank=True, null=True, verbose_name="Boshlangan vaqt")
+    tugadi = models.DateTimeField(blank=True, null=True, verbose_name="Tugagan vaqt")
+
+    class Meta:
+        verbose_name = "Import Vazifasi"
+        verbose_name_plural = "Import Vazifalari"
+
+    @property
+    def davomiyligi(self):
+        """Import qancha vaqt davom etgani (soniyalarda)."""
+        if self.boshlandi and self.tugadi:
+            return (self.tugadi - self.boshlandi).total_seconds()
+        return None
+
+    def __str__(self):
+        return f"#{self.pk} {self.fayl.name} {self.get_holat_display()}"
+
+
 class KirdiChiqdiForm(forms.ModelForm):
     class Meta:
         model = KirdiChiqdi
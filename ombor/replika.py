@@ -0,0 +1,115 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template.response import SimpleTemplateResponse
+
+# O'qish uchun replika bazasi (`REPLICA_DATABASE_URL`). Yozuvlar har doim asosiy bazaga boradi.
+REPLIKA = 'replica'
+# Foydalanuvchi yozgandan keyin uning so'rovlari shu vaqtgacha asosiy bazadan o'qiladi (sessiyada)
+YOZUV_SESSIYA_KALITI = 'ombor_asosiy_bazadan'
+
+_replikadan = ContextVar('ombor_replikadan', default=False)
+
+
+def replika_bormi():
+    return REPLIKA in connections.settings
+
+
+def oqish_bazasi(request):
+    """
+    So'rov uchun o'qish bazasi: replika sozlangan va foydalanuvchi yaqinda yozmagan bo'lsa replika.
+    Yozgandan keyin (`yozuvni_belgilash`) replika hali yetib kelmagan bo'lishi mumkin.
+    """
+    if replika_bormi() and request.session.get(YOZUV_SESSIYA_KALITI, 0) < time.time():
+        return REPLIKA
+    return DEFAULT_DB_ALIAS
+
+
+def yozuvni_belgilash(request):
+    """Foydalanuvchi o'z yozuvini ko'rishi uchun keyingi so'rovlar `REPLIKA_KECHIKISHI` davomida asosiy bazadan."""
+    if replika_bormi():
+        request.session[YOZUV_SESSIYA_KALITI] = time.time() + settings.REPLIKA_KECHIKISHI
+
+
+@contextmanager
+def replikadan_oqish(request):
+    """Blok ichidagi o'qish so'rovlari (`ReplikaRouter` orqali) replikaga yuboriladi."""
+    token = _replikadan.set(oqish_bazasi(request) == REPLIKA)
+    try:
+        yield
+    finally:
+        _replikadan.reset(token)
+
+
+def replikadan_korinish(view):
+    """Faqat o'qiydigan view uchun. TemplateResponse ham shu yerda chiziladi: shablon so'rovlari replikaga."""
+    @functools.wraps(view)
+    def orab_olingan(request, *args, **kwargs):
+        with replikadan_oqish(request):
+            response = view(request, *args, **kwargs)
+            if isinstance(response, SimpleTemplateResponse):
+                response.render()
+        return response
+    return orab_olingan
+
+
+def replikadan_amal(amal):
+    """Faqat o'qiydigan admin amali (eksport, hisobot) uchun."""
+    @functools.wraps(amal)
+    def orab_olingan(modeladmin, request, queryset):
+        with replikadan_oqish(request):
+            return amal(modeladmin, request, queryset)
+    return orab_olingan
+
+
+class ReplikaRouter:
+    """
+    `replikadan_oqish` bloki ichidagi o'qishlarni replikaga yuboradi. Boshqa hamma so'rovlar, jumladan
+    harakat yozish, balans tekshiruvi va import, asosiy bazada qoladi. Replikaga migratsiya qilinmaydi.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Yozuv tranzaksiyasi ichidagi o'qishlar o'z yozuvlarini ko'rishi kerak
+        if _replikadan.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLIKA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replika asosiy bazaning nusxasi: ikkala bazadan o'qilgan obyektlar bog'lanishi mumkin
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLIKA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == REPLIKA:
+            return False
+        return None
+
+
+class ReplikaAdminMixin:
+    """Changelist (GET) replikadan o'qiladi; admin orqali yozgan foydalanuvchi o'z yozuvini darhol ko'radi."""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            # Amallar va list_editable: yozishi mumkin, faqat o'qiydigan amallar o'zi replikaga o'tadi
+            return super().changelist_view(request, extra_context)
+        return replikadan_korinish(super().changelist_view)(request, extra_context)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        yozuvni_belgilash(request)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        yozuvni_belgilash(request)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        yozuvni_belgilash(request)
@@ -0,0 +1,207 @@
+import hashlib
+from datetime import datetime
+
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject, cached_property
+
+# Bundan kam yozuvli so'rovlarda aniq COUNT(*) arzon, taxminiy son ishlatilmaydi
+ANIQ_SANASH_CHEGARASI = 10000
+# Katta so'rovlar uchun keshlangan COUNT(*) natijasining amal qilish muddati (soniya)
+SON_KESH_MUDDATI = 5 * 60
+
+# Kursor parametrlari: `keyin` - shu yozuvdan keyingi (eskiroq) sahifa, `oldin` - oldingi (yangiroq) sahifa
+KURSOR_KEYIN = 'keyin'
+KURSOR_OLDIN = 'oldin'
+# Kalitli sahifalash faqat shu tartibda ishlaydi (boshqa ustun bo'yicha saralanganda OFFSET ishlatiladi)
+KALIT_TARTIBI = ('-sana', '-id')
+
+
+def taxminiy_son(queryset):
+    """
+    Querysetdagi yozuvlar soni (taxminan).
+
+    PostgreSQL'da filtrsiz so'rov uchun statistikadagi `pg_class.reltuples` olinadi. Qolgan hollarda
+    (SQLite, filtrlangan so'rov) aniq COUNT(*) keshlanadi; kichik natijalar har safar aniq sanaladi.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            qator = cursor.fetchone()
+        # reltuples jadval hali ANALYZE qilinmagan bo'lsa -1 (yoki 0) bo'ladi
+        if qator and qator[0] >= ANIQ_SANASH_CHEGARASI:
+            return int(qator[0])
+        return queryset.count()
+
+    sql, params = queryset.query.sql_with_params()
+    kalit = "ombor:son:" + hashlib.md5(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+    son = cache.get(kalit)
+    if son is None:
+        son = queryset.count()
+        if son >= ANIQ_SANASH_CHEGARASI:
+            cache.set(kalit, son, SON_KESH_MUDDATI)
+    return son
+
+
+def kursor_yasash(obj):
+    """Yozuvning `(sana, id)` kaliti URL parametri sifatida."""
+    return f"{obj.sana.isoformat()}_{obj.pk}"
+
+
+def kursorni_ochish(qiymat):
+    try:
+        sana, pk = qiymat.rsplit('_', 1)
+        return datetime.fromisoformat(sana), int(pk)
+    except ValueError:
+        raise InvalidPage("Noto'g'ri kursor")
+
+
+class KalitliSahifa(Page):
+    """
+    Kalitli sahifa. Qatorlar (`per_page + 1` ta) birinchi murojaatda o'qiladi: admin amali bajarilganda
+    ro'yxat umuman o'qilmaydi. Ortiqcha qator keyingi (yoki oldingi) sahifa borligini bildiradi.
+    """
+
+    def __init__(self, queryset, number, paginator, kursor_bor=False, teskari=False):
+        self.queryset = queryset
+        self._number = number
+        self.paginator = paginator
+        self.kursor_bor = kursor_bor
+        self.teskari = teskari
+        self.object_list = SimpleLazyObject(lambda: self._natija[0])
+
+    @cached_property
+    def _natija(self):
+        per_page = self.paginator.per_page
+        qatorlar = list(self.queryset)
+        if not self.kursor_bor:
+            return qatorlar[:per_page], False, len(qatorlar) > per_page, self._number
+        if not self.teskari:
+            return qatorlar[:per_page], True, len(qatorlar) > per_page, self._number
+        if len(qatorlar) > per_page:
+            return qatorlar[per_page - 1::-1], True, True, self._number
+        # Boshiga yetib kelindi: birinchi sahifa to'liq ko'rsatiladi
+        qatorlar = list(self.paginator.object_list[:per_page + 1])
+        return qatorlar[:per_page], False, len(qatorlar) > per_page, 1
+
+    @property
+    def number(self):
+        return self._natija[3]
+
+    def has_previous(self):
+        return self._natija[1]
+
+    def has_next(self):
+        return self._natija[2]
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return max(self.number - 1, 1)
+
+    @property
+    def birinchi_url(self):
+        return self.paginator.url()
+
+    @property
+    def oldingi_url(self):
+        if not self._natija[0]:  # Oxiridan o'tib ketgan kursor
+            return self.birinchi_url
+        return self.paginator.url(**{KURSOR_OLDIN: kursor_yasash(self._natija[0][0]),
+                                     PAGE_VAR: self.previous_page_number()})
+
+    @property
+    def keyingi_url(self):
+        return self.paginator.url(**{KURSOR_KEYIN: kursor_yasash(self._natija[0][-1]),
+                                     PAGE_VAR: self.next_page_number()})
+
+
+class KalitliPaginator(Paginator):
+    """
+    `(sana, id)` kaliti bo'yicha (keyset) sahifalash.
+
+    OFFSET o'rniga oxirgi ko'rsatilgan yozuvdan keyingilar indeks orqali o'qiladi, shuning uchun
+    chuqur sahifalar ham birinchi sahifa kabi arzon. Yozuvlar soni `taxminiy_son` bilan olinadi.
+    Admin boshqa ustun bo'yicha saralanganda oddiy OFFSET sahifalashga qaytadi.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, request=None):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.request = request
+        self.joriy_sahifa = None
+
+    @cached_property
+    def count(self):
+        return taxminiy_son(self.object_list)
+
+    @property
+    def taxminiy(self):
+        return self.count >= ANIQ_SANASH_CHEGARASI
+
+    @property
+    def kalitli(self):
+        # ChangeList admin tartibiga querysetning o'z tartibini ham qo'shadi, takrorlar olib tashlanadi
+        tartib = tuple(dict.fromkeys(self.object_list.query.order_by))
+        return self.request is not None and tartib == KALIT_TARTIBI
+
+    def url(self, **parametrlar):
+        """Joriy filtrlarni saqlagan holda kursor parametrlari almashtirilgan havola."""
+        query = self.request.GET.copy()
+        for nom in (KURSOR_KEYIN, KURSOR_OLDIN, PAGE_VAR):
+            query.pop(nom, None)
+        for nom, qiymat in parametrlar.items():
+            query[nom] = qiymat
+        return f"?{query.urlencode()}"
+
+    def page(self, number):
+        if not self.kalitli:
+            return super().page(number)
+
+        queryset = self.object_list
+        number = max(int(number), 1)
+        parametrlar = self.request.GET
+        if KURSOR_KEYIN in parametrlar:
+            sana, pk = kursorni_ochish(parametrlar[KURSOR_KEYIN])
+            sahifa = KalitliSahifa(
+                queryset.filter(Q(sana__lt=sana) | Q(sana=sana, pk__lt=pk), sana__lte=sana)[:self.per_page + 1],
+                number, self, kursor_bor=True)
+        elif KURSOR_OLDIN in parametrlar:
+            sana, pk = kursorni_ochish(parametrlar[KURSOR_OLDIN])
+            sahifa = KalitliSahifa(
+                queryset.filter(Q(sana__gt=sana) | Q(sana=sana, pk__gt=pk), sana__gte=sana)
+                .reverse()[:self.per_page + 1],
+                number, self, kursor_bor=True, teskari=True)
+        else:
+            sahifa = KalitliSahifa(queryset[:self.per_page + 1], 1, self)
+        self.joriy_sahifa = sahifa
+        return sahifa
+
+
+class KalitliChangeList(ChangeList):
+    """Kursor parametrlari filtr sifatida qaralmaydi va filtr/saralash havolalarida saqlanmaydi."""
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for nom in (KURSOR_KEYIN, KURSOR_OLDIN):
+            lookup_params.pop(nom, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        return super().get_query_string(new_params, [*(remove or []), KURSOR_KEYIN, KURSOR_OLDIN])
+
+
+class KalitliSahifalashMixin:
+    """Katta tarix jadvallari uchun admin: taxminiy son va `(sana, id)` bo'yicha kalitli sahifalash."""
+    paginator = KalitliPaginator
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, request=request)
+
+    def get_changelist(self, request, **kwargs):
+        return KalitliChangeList
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import KirdiChiqdi, Mahsulot, MahsulotBalans, OlchovBirligi
+from .models import api_versiyasini_yangilash, olchov_birliklari_versiyasini_yangilash, qoldiq_keshini_tozalash
+
+
+@receiver([post_save, post_delete], sender=KirdiChiqdi)
+@receiver([post_save, post_delete], sender=Mahsulot)
+@receiver([post_save, post_delete], sender=OlchovBirligi)
+def olchov_birliklari_keshini_yangilash(sender, created=False, **kwargs):
+    """
+    Harakat, mahsulot yoki o'lchov birligi o'zgarsa yoki o'chirilsa, ishlatilgan birliklar keshi eskiradi.
+    Yangi harakat oxirgi ID ni o'zgartiradi, yangi mahsulot va birlik esa hali harakatlarda ishlatilmagan.
+    """
+    if not created:
+        olchov_birliklari_versiyasini_yangilash()
+
+
+@receiver([post_save, post_delete], sender=KirdiChiqdi)
+@receiver([post_save, post_delete], sender=MahsulotBalans)
+@receiver([post_save, post_delete], sender=Mahsulot)
+@receiver([post_save, post_delete], sender=OlchovBirligi)
+def api_keshini_yangilash(sender, created=False, **kwargs):
+    """
+    Yangi harakat (va birinchi harakat bilan yaratilgan balans) oxirgi ID ni o'zgartiradi;
+    boshqa o'zgarishlar API versiyasini yangilaydi.
+    """
+    if not (sender in (KirdiChiqdi, MahsulotBalans) and created):
+        api_versiyasini_yangilash()
+
+
+@receiver([post_save, post_delete], sender=MahsulotBalans)
+def qoldiq_keshini_yangilash(sender, instance, **kwargs):
+    """Balans qatori to'g'ridan-to'g'ri (admin orqali) o'zgartirilsa yoki o'chirilsa, keshdagi qoldiq eskiradi."""
+    qoldiq_keshini_tozalash(instance.mahsulot_nomi_id)
+
+
+@receiver(connection_created)
+def sqlite_pragmalarini_ornatish(sender, connection, **kwargs):
+    """SQLite ulanishiga `SQLITE_PRAGMALAR` sozlamalarini qo'llaydi (WAL, busy_timeout va h.k.)."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for nom, qiymat in settings.SQLITE_PRAGMALAR.items():
+            cursor.execute(f"PRAGMA {nom} = {qiymat}")
@@ -0,0 +1,117 @@
+import io
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+import openpyxl
+from django.utils import timezone
+
+from .models import KirdiChiqdi, Mahsulot, MahsulotBalans, MahsulotBalansTarix, OlchovBirligi, nom_kaliti
+
+# Chiqdi harakatlari uchun qabul qiluvchilar va joylar (`maydonlarni_tekshirish` talablariga mos)
+KIMGA = ["Aliyev Vali", "Karimova Nodira", "Toshmatov Sardor", "Yusupova Malika", "Rahimov Jasur"]
+QAYERGA = ["101 XONA", "202 XONA", "KUTUBXONA", "BUXGALTERIYA", "LABORATORIYA 3"]
+
+
+class SintetikOmbor:
+    """
+    Benchmark va stress testlar uchun sintetik ombor: o'lchov birliklari, mahsulotlar va
+    oxirgi `kunlar` kunga yoyilgan Kirdi/Chiqdi harakatlari.
+
+    Mahsulotlar mashhurligi Zipf taqsimotiga yaqin (bir nechta mahsulot harakatlarning katta qismini oladi).
+    Chiqdi faqat qoldiq yetarli bo'lganda yoziladi, shuning uchun harakatlar balans qoidalarini buzmaydi.
+    """
+
+    def __init__(self, birliklar=10, mahsulotlar=200, chiqdi_ulushi=0.4, seed=1):
+        self.birliklar_soni = birliklar
+        self.mahsulotlar_soni = mahsulotlar
+        self.chiqdi_ulushi = chiqdi_ulushi
+        self.tasodif = random.Random(seed)
+        self.mahsulot_idlar = []
+        self.qoldiqlar = {}
+
+    def mahsulotlarni_yaratish(self):
+        birliklar = OlchovBirligi.objects.bulk_create(
+            OlchovBirligi(olchov_birligi=f"Birlik {i}", kalit=nom_kaliti(f"Birlik {i}"))
+            for i in range(1, self.birliklar_soni + 1)
+        )
+        mahsulotlar = Mahsulot.objects.bulk_create(
+            Mahsulot(mahsulot_nomi=f"Mahsulot {i}", kalit=nom_kaliti(f"Mahsulot {i}"),
+                     olchov_birligi=birliklar[i % len(birliklar)])
+            for i in range(1, self.mahsulotlar_soni + 1)
+        )
+        self.mahsulot_idlar = [mahsulot.pk for mahsulot in mahsulotlar]
+        self.ogirliklar = [1 / tartib for tartib in range(1, len(mahsulotlar) + 1)]
+        return mahsulotlar
+
+    def tasodifiy_mahsulot(self):
+        return self.tasodif.choices(self.mahsulot_idlar, self.ogirliklar)[0]
+
+    def summa(self):
+        return Decimal(self.tasodif.randrange(1000, 500000, 500))
+
+    def kirdi(self, mahsulot_id=None):
+        mahsulot_id = mahsulot_id or self.tasodifiy_mahsulot()
+        miqdor = self.tasodif.randint(5, 100)
+        self.qoldiqlar[mahsulot_id] = self.qoldiqlar.get(mahsulot_id, 0) + miqdor
+        return KirdiChiqdi(mahsulot_nomi_id=mahsulot_id, miqdor=miqdor, summa=self.summa(), amaliyot_turi="Kirdi")
+
+    def chiqdi(self, mahsulot_id=None):
+        """Chiqdi harakati; mahsulot berilmasa qoldig'i eng ko'p mahsulotdan."""
+        mahsulot_id = mahsulot_id or max(self.qoldiqlar, key=self.qoldiqlar.get)
+        miqdor = self.tasodif.randint(1, min(self.qoldiqlar[mahsulot_id], 20))
+        self.qoldiqlar[mahsulot_id] -= miqdor
+        return KirdiChiqdi(mahsulot_nomi_id=mahsulot_id, miqdor=miqdor, summa=self.summa(),
+                           amaliyot_turi="Chiqdi", kimga=self.tasodif.choice(KIMGA),
+                           qayerga=self.tasodif.choice(QAYERGA))
+
+    def harakat(self):
+        """Bitta saqlanmagan harakat. Qoldiq bo'lsa `chiqdi_ulushi` ehtimol bilan Chiqdi, aks holda Kirdi."""
+        mahsulot_id = self.tasodifiy_mahsulot()
+        if self.qoldiqlar.get(mahsulot_id) and self.tasodif.random() < self.chiqdi_ulushi:
+            return self.chiqdi(mahsulot_id)
+        return self.kirdi(mahsulot_id)
+
+    def harakatlarni_yaratish(self, soni, kunlar=365):
+        """
+        `soni` ta harakatni kunlar bo'yicha `post_many` bilan yozadi va sanalarini o'tmishga suradi.
+        Kunlik/oylik yig'indilar va harakat kunlari keyin `ombor_yigindilar` bilan qayta qurilishi kerak.
+        """
+        self.qoldiqlar.update(MahsulotBalans.objects.values_list('mahsulot_nomi_id', 'qoldiq'))
+        # Ish kuni 9:00 dan 17:00 gacha: `kunlar` kun oldindan kechagacha
+        boshlanish = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=kunlar), time(9)))
+        yozildi = 0
+        for kun in range(kunlar):
+            # Harakatlar kunlarga teng taqsimlanadi
+            kunlik = soni * (kun + 1) // kunlar - soni * kun // kunlar
+            if not kunlik:
+                continue
+            harakatlar = [self.harakat() for _ in range(kunlik)]
+            oxirgi_tarix = MahsulotBalansTarix.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            KirdiChiqdi.objects.post_many(harakatlar)
+
+            # Kun ichida ish vaqtiga yoyilgan, yozilish tartibida o'suvchi vaqtlar
+            kun_boshi = boshlanish + timedelta(days=kun)
+            qadam = timedelta(hours=8) / len(harakatlar)
+            tarixlar = list(MahsulotBalansTarix.objects.filter(id__gt=oxirgi_tarix).order_by('id'))
+            for tartib, (harakat, tarix) in enumerate(zip(harakatlar, tarixlar)):
+                harakat.sana = tarix.sana = kun_boshi + qadam * tartib
+            KirdiChiqdi.objects.bulk_update(harakatlar, ['sana'], batch_size=500)
+            MahsulotBalansTarix.objects.bulk_update(tarixlar, ['sana'], batch_size=500)
+            yozildi += len(harakatlar)
+        return yozildi
+
+    def excel_fayl(self, qatorlar):
+        """Mavjud mahsulotlar uchun `kirdi_upload_view` formatidagi Kirdi fayli."""
+        birliklar = dict(Mahsulot.objects.values_list('pk', 'olchov_birligi__olchov_birligi'))
+        nomlar = dict(Mahsulot.objects.values_list('pk', 'mahsulot_nomi'))
+        wb = openpyxl.Workbook()
+        sheet = wb.active
+        sheet.append(["Mahsulot nomi", "Miqdor", "O'lchov birligi", "Summa"])
+        for _ in range(qatorlar):
+            mahsulot_id = self.tasodifiy_mahsulot()
+            sheet.append([nomlar[mahsulot_id], self.tasodif.randint(1, 50), birliklar[mahsulot_id],
+                          float(self.summa())])
+        fayl = io.BytesIO()
+        wb.save(fayl)
+        return fayl.getvalue()
@@ -0,0 +1,91 @@
+import datetime
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.db.models import Max, Min
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+from ..models import HarakatKuni
+
+register = template.Library()
+
+
+def harakat_kunlaridan(cl):
+    """Navigatsiyani `HarakatKuni` dan qurish mumkinmi: qidiruv va sana ierarxiyasidan boshqa filtr yo'q."""
+    maydon = cl.date_hierarchy
+    ierarxiya = {f"{maydon}__year", f"{maydon}__month", f"{maydon}__day"}
+    return not cl.query and set(cl.get_filters_params()) <= ierarxiya
+
+
+def sana_ierarxiyasi(cl):
+    """
+    Django `date_hierarchy` ning harakatlar jadvali uchun varianti: yil, oy va kun tanlovlari butun jadval
+    bo'yicha DISTINCT so'rovlar o'rniga kichik `HarakatKuni` jadvalidan olinadi.
+    Boshqa filtr yoki qidiruv berilganda Django'ning odatiy hisobiga qaytadi.
+    """
+    maydon = cl.date_hierarchy
+    yil_maydoni, oy_maydoni, kun_maydoni = f"{maydon}__year", f"{maydon}__month", f"{maydon}__day"
+    if not harakat_kunlaridan(cl) or cl.params.get(kun_maydoni):
+        # Kun tanlanganda Django bazaga murojaat qilmaydi
+        return date_hierarchy(cl)
+
+    def havola(filtrlar):
+        return cl.get_query_string(filtrlar, [f"{maydon}__"])
+
+    yil, oy = cl.params.get(yil_maydoni), cl.params.get(oy_maydoni)
+    kunlar = HarakatKuni.objects.kunlar(cl.model)
+    if not (yil or oy):
+        # Boshlang'ich darajani tanlash: barcha harakatlar bir yil (oy) ichida bo'lsa, shu yil (oy) ochiladi
+        oraliq = kunlar.aggregate(boshi=Min('sana'), oxiri=Max('sana'))
+        if oraliq['boshi'] and oraliq['boshi'].year == oraliq['oxiri'].year:
+            yil = oraliq['boshi'].year
+            if oraliq['boshi'].month == oraliq['oxiri'].month:
+                oy = oraliq['boshi'].month
+
+    if yil and oy:
+        oy_boshi = datetime.date(int(yil), int(oy), 1)
+        keyingi_oy = (oy_boshi + datetime.timedelta(days=31)).replace(day=1)
+        kunlar = kunlar.filter(sana__gte=oy_boshi, sana__lt=keyingi_oy).order_by('sana').values_list('sana', flat=True)
+        return {
+            "show": True,
+            "back": {"link": havola({yil_maydoni: yil}), "title": str(yil)},
+            "choices": [
+                {
+                    "link": havola({yil_maydoni: yil, oy_maydoni: oy, kun_maydoni: kun.day}),
+                    "title": capfirst(formats.date_format(kun, "MONTH_DAY_FORMAT")),
+                }
+                for kun in kunlar
+            ],
+        }
+    elif yil:
+        yil_boshi = datetime.date(int(yil), 1, 1)
+        oylar = kunlar.filter(sana__gte=yil_boshi, sana__lt=yil_boshi.replace(year=yil_boshi.year + 1))
+        return {
+            "show": True,
+            "back": {"link": havola({}), "title": _("All dates")},
+            "choices": [
+                {
+                    "link": havola({yil_maydoni: yil, oy_maydoni: oy_sanasi.month}),
+                    "title": capfirst(formats.date_format(oy_sanasi, "YEAR_MONTH_FORMAT")),
+                }
+                for oy_sanasi in oylar.dates('sana', 'month')
+            ],
+        }
+    return {
+        "show": True,
+        "back": None,
+        "choices": [
+            {"link": havola({yil_maydoni: str(yil_sanasi.year)}), "title": str(yil_sanasi.year)}
+            for yil_sanasi in kunlar.dates('sana', 'year')
+        ],
+    }
+
+
+@register.tag(name="sana_ierarxiyasi")
+def sana_ierarxiyasi_tag(parser, token):
+    return InclusionAdminNode(
+        parser, token, func=sana_ierarxiyasi, template_name="date_hierarchy.html", takes_context=False
+    )
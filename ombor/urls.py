@@ -1,7 +1,18 @@
 # urls.py
+from django.contrib import admin
 from django.urls import path
-from .views import kirdi_upload_view
+from .views import kirdi_upload_view, import_vazifa_view, import_vazifa_holat_view, eksport_view, qoldiq_varaqasi_view
+from .views import harakatlar_api_view, qoldiqlar_api_view
 
+# Sahifalar admin panel qismi: admin_view xodim va OTP tekshiruvini qo'shadi
 urlpatterns = [
-    path('admin/kirdi-upload/', kirdi_upload_view, name='kirdi_upload'),
+    path('admin/kirdi-upload/', admin.site.admin_view(kirdi_upload_view), name='kirdi_upload'),
+    path('admin/import/<int:pk>/', admin.site.admin_view(import_vazifa_view), name='import_vazifa'),
+    path('admin/import/<int:pk>/holat/', admin.site.admin_view(import_vazifa_holat_view),
+         name='import_vazifa_holat'),
+    path('admin/eksport/<str:model_nomi>/', admin.site.admin_view(eksport_view), name='eksport'),
+    path('admin/qoldiq-varaqasi/', admin.site.admin_view(qoldiq_varaqasi_view), name='qoldiq_varaqasi'),
+    path('admin/api/qoldiqlar/', admin.site.admin_view(qoldiqlar_api_view), name='api_qoldiqlar'),
+    path('admin/api/mahsulot/<int:pk>/harakatlar/', admin.site.admin_view(harakatlar_api_view),
+         name='api_harakatlar'),
 ]
@@ -1,94 +1,228 @@
+import hashlib
+import json
+from datetime import datetime, time, timedelta
+from itertools import chain
+
 from django.contrib import messages
-from django.shortcuts import render, redirect
-from django.core.exceptions import ValidationError
-from .forms import KirdiChiqdiUploadForm
-from .models import Mahsulot, OlchovBirligi, KirdiChiqdi
-from datetime import datetime
-import openpyxl
-from decimal import Decimal
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Max
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.timezone import localdate, make_aware
+from .eksport import CHUNK_SIZE, csv_oqimi, eksport_qatorlari, eksport_ustunlari, gzip_oqimi, ndjson_oqimi
+from .forms import EksportForm, HarakatlarApiForm, KirdiChiqdiUploadForm, QoldiqlarApiForm, QoldiqVaraqasiForm
+from .models import ImportVazifa, KirdiChiqdi, Mahsulot, MahsulotBalans, MahsulotBalansTarix, MahsulotBalansTarixArxiv
+from .models import api_versiyasi
+from .replika import oqish_bazasi, replikadan_korinish
 
+# Oqimli eksport qilinadigan jadvallar: manzildagi nom -> model
+EKSPORT_MODELLARI = {
+    "kirdi-chiqdi": KirdiChiqdi,
+    "tarix": MahsulotBalansTarix,
+}
+# `arxiv=1` so'ralganda asosiy jadvaldan oldin o'qiladigan arxiv jadvallari
+EKSPORT_ARXIVLARI = {
+    "tarix": MahsulotBalansTarixArxiv,
+}
 
-def kirdi_upload_view(request):
-    # Hozirgi vaqtni olish
-    now = datetime.now()
 
+def kirdi_upload_view(request):
     if request.method == "POST":
         form = KirdiChiqdiUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            file = form.cleaned_data["file"]
-            try:
-                # Excel faylni o'qiymiz
-                wb = openpyxl.load_workbook(file)
-                sheet = wb.active
-
-                # Fayldagi validatsiya
-                required_columns = 4  # kerakli ustunlar soni (endilikda summa ustuni qo'shildi)
-                if sheet.max_column < required_columns:
-                    messages.error(request, "Faylda kerakli ustunlar yetarli emas!")
-                    return redirect("admin:index")
-
-                # Fayldagi ma'lumotlarni qayta ishlash
-                for row in sheet.iter_rows(min_row=2, values_only=True):  # Birinchi qatordan tashqari
-                    if len(row) < required_columns or not all(row[:required_columns]):
-                        messages.warning(request, f"Ma'lumot to'liq emas: {row}")
-                        continue
-
-                    mahsulot_nomi = row[0].strip()
-                    miqdor = row[1]
-                    olchov_birligi_nomi = row[2].strip()
-                    summa = row[3]  # Yangi summa ustuni
-
-                    # Summa tekshiruvi
-                    try:
-                        summa = Decimal(summa)  # Summa decimalga o'tkaziladi
-                        if summa <= 0:
-                            messages.warning(request, f"Summa musbat bo'lishi kerak: {row}")
-                            continue
-                    except (ValueError, TypeError):
-                        messages.warning(request, f"Summa noto'g'ri formatda: {row}")
-                        continue
-
-                    # O'lchov birligi bazada bormi yoki yaratamiz
-                    olchov_birligi, _ = OlchovBirligi.objects.get_or_create(
-                        olchov_birligi=olchov_birligi_nomi.title()
-                    )
-
-                    # Mahsulotni yaratish yoki olish
-                    try:
-                        mahsulot = Mahsulot.objects.filter(
-                            mahsulot_nomi__iexact=mahsulot_nomi.strip(),
-                            olchov_birligi=olchov_birligi
-                        ).first()
-
-                        if mahsulot is None:
-                            mahsulot = Mahsulot(
-                                mahsulot_nomi=mahsulot_nomi,
-                                olchov_birligi=olchov_birligi
-                            )
-                            mahsulot.clean()  # Validatsiya qilish
-                            mahsulot.save()  # Saqlash
-                    except ValidationError as e:
-                        messages.warning(request, f"Xatolik: {e.message_dict.get('mahsulot_nomi', 'Xato!')}")
-                        continue
-
-                    # KirdiChiqdi modeliga ma'lumotni saqlash
-                    KirdiChiqdi.objects.create(
-                        mahsulot_nomi=mahsulot,
-                        miqdor=miqdor,
-                        summa=summa,  # Summa qo'shildi
-                        sana=now,
-                        amaliyot_turi="Kirdi"
-                    )
-                messages.success(request, "Fayl muvaffaqiyatli yuklandi va ma'lumotlar saqlandi!")
-                return redirect("admin:index")
-            except Exception as e:
-                messages.error(request, f"Xatolik yuz berdi: {e}")
+            # Fayl saqlanadi va navbatga qo'yiladi, importni `ombor_import_worker` bajaradi
+            vazifa = ImportVazifa.objects.create(
+                fayl=form.cleaned_data["file"],
+                faqat_tekshirish=form.cleaned_data["faqat_tekshirish"],
+                yaratgan=request.user
+            )
+            messages.success(request, f"Fayl navbatga qo'yildi (vazifa #{vazifa.pk}).")
+            return redirect("import_vazifa", pk=vazifa.pk)
     else:
         form = KirdiChiqdiUploadForm()
 
     return render(request, "admin/kirdi_upload.html", {"form": form})
 
 
+def import_vazifa_view(request, pk):
+    vazifa = get_object_or_404(ImportVazifa, pk=pk)
+    return render(request, "admin/import_vazifa.html", {"vazifa": vazifa, "title": f"Import vazifasi #{vazifa.pk}"})
+
+
+def import_vazifa_holat_view(request, pk):
+    """Holat sahifasi shu manzilni so'rab, progressni yangilab turadi."""
+    vazifa = get_object_or_404(ImportVazifa, pk=pk)
+    return JsonResponse({
+        "id": vazifa.pk,
+        "holat": vazifa.holat,
+        "holat_nomi": vazifa.get_holat_display(),
+        "jami_qatorlar": vazifa.jami_qatorlar,
+        "qatorlar": vazifa.qatorlar,
+        "saqlandi": vazifa.saqlandi,
+        "xato_qatorlar": vazifa.xato_qatorlar,
+        "xatolar": vazifa.xatolar.splitlines()[:50],
+        "xato_hisoboti": vazifa.xato_hisoboti.url if vazifa.xato_hisoboti else None,
+        "davomiyligi": vazifa.davomiyligi,
+        "tugadi": vazifa.holat in (ImportVazifa.TAYYOR, ImportVazifa.XATO),
+    })
+
+
+def eksport_view(request, model_nomi):
+    """
+    Tarixni CSV yoki NDJSON ko'rinishida oqim bilan beradi.
+
+    Parametrlar: `dan`, `gacha` (YYYY-MM-DD, ikkalasi ham kiradi), `mahsulot` (ID),
+    `format` (csv|ndjson), `gzip=1`, `arxiv=1` (arxivlangan yillar ham). Qatorlar bazadan bo'laklab o'qiladi,
+    shuning uchun javob hajmidan qat'i nazar xotira sarfi o'zgarmaydi.
+    """
+    model = EKSPORT_MODELLARI.get(model_nomi)
+    if model is None:
+        raise Http404("Bunday jadval eksport qilinmaydi.")
+
+    form = EksportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"xatolar": form.errors}, status=400)
+    dan, gacha = form.cleaned_data["dan"], form.cleaned_data["gacha"]
+    mahsulot_id = form.cleaned_data["mahsulot"]
+    format_ = form.cleaned_data["format"] or "csv"
+
+    # Sana oralig'i indeksdan foydalanishi uchun `sana__date` emas, vaqt chegaralari bilan filtrlanadi
+    filtrlar = {}
+    if dan:
+        filtrlar["sana__gte"] = make_aware(datetime.combine(dan, time.min))
+    if gacha:
+        filtrlar["sana__lt"] = make_aware(datetime.combine(gacha + timedelta(days=1), time.min))
+    if mahsulot_id:
+        filtrlar["mahsulot_nomi_id"] = mahsulot_id
+
+    # Qatorlar (sana, id) tartibida: arxivlashda qo'shilgan boshlang'ich yozuvlar keyingi yillar yozuvlaridan
+    # katta ID oladi, lekin sanasi ulardan oldin. Arxivlangan yozuvlar esa asosiy jadvaldagilardan oldin
+    modellar = [model]
+    if form.cleaned_data["arxiv"] and model_nomi in EKSPORT_ARXIVLARI:
+        modellar.insert(0, EKSPORT_ARXIVLARI[model_nomi])
+
+    ustunlar = eksport_ustunlari(model)
+    kalitlar = [yol.split("__")[0] for _, yol in ustunlar]
+    # Qatorlar javob qaytgandan keyin o'qiladi, shuning uchun baza querysetga aniq biriktiriladi
+    baza = oqish_bazasi(request)
+    qatorlar = chain.from_iterable(
+        eksport_qatorlari(manba.objects.using(baza).filter(**filtrlar).order_by("sana", "id"),
+                          [yol for _, yol in ustunlar], CHUNK_SIZE)
+        for manba in modellar
+    )
+    if format_ == "ndjson":
+        oqim, content_type = ndjson_oqimi(kalitlar, qatorlar), "application/x-ndjson; charset=utf-8"
+    else:
+        oqim, content_type = csv_oqimi(kalitlar, qatorlar), "text/csv; charset=utf-8"
+
+    fayl_nomi = f"{model._meta.model_name}.{format_}"
+    if form.cleaned_data["gzip"]:
+        oqim, content_type, fayl_nomi = gzip_oqimi(oqim), "application/gzip", f"{fayl_nomi}.gz"
+
+    response = StreamingHttpResponse(oqim, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{fayl_nomi}"'
+    return response
+
+
+@replikadan_korinish
+def qoldiq_varaqasi_view(request):
+    """Tanlangan kun oxiridagi barcha mahsulotlar qoldig'i."""
+    form = QoldiqVaraqasiForm(request.GET or None, initial={"sana": localdate()})
+    sana = form.cleaned_data["sana"] if form.is_valid() else localdate()
+    # Kun oxiri: shu kuni yozilgan barcha harakatlar hisobga olinadi
+    vaqt = make_aware(datetime.combine(sana, time.max))
+    return render(request, "admin/qoldiq_varaqasi.html", {
+        "title": f"{sana:%d.%m.%Y} holatiga ombor qoldig'i",
+        "form": form,
+        "sana": sana,
+        "mahsulotlar": MahsulotBalansTarix.objects.qoldiqlar_sanada(vaqt, arxiv=True),
+    })
+
+
+# === JSON API ===
+# Javob ETag i oxirgi harakat ID si va API versiyasidan olinadi: yangi harakat yozilmaguncha
+# mijozlar 304 oladi, tayyor JSON esa keshdan beriladi. Ikkalasi ham bazadan o'qiladi, shuning uchun
+# boshqa jarayon yozgan o'zgarish ham ETag ni (va kesh kalitini) o'zgartiradi.
+API_KESH_MUDDATI = 60 * 60
+HARAKATLAR_SONI = 100
+
+
+def api_etag(request, oxirgi_id):
+    """So'rov manzili va parametrlariga bog'langan kuchli ETag."""
+    manzil = f"{request.path}?{sorted(request.GET.lists())}"
+    return f'"{oxirgi_id or 0}-{api_versiyasi()}-{hashlib.md5(manzil.encode()).hexdigest()[:16]}"'
+
+
+def api_javobi(request, etag, malumot):
+    """ETag mos kelsa 304, aks holda keshlangan (yoki endi tayyorlangan) JSON javob."""
+    javob = get_conditional_response(request, etag=etag)
+    if javob is None:
+        kalit = f"ombor:api:{hashlib.md5(etag.encode()).hexdigest()}"
+        matn = cache.get(kalit)
+        if matn is None:
+            matn = json.dumps(malumot(), cls=DjangoJSONEncoder, ensure_ascii=False)
+            cache.set(kalit, matn, API_KESH_MUDDATI)
+        javob = HttpResponse(matn, content_type="application/json")
+    javob["ETag"] = etag
+    # Mijoz har safar ETag bilan tekshiradi
+    patch_cache_control(javob, private=True, no_cache=True)
+    return javob
+
+
+def qoldiqlar_api_view(request):
+    """Joriy qoldiqlar. Parametrlar: `mahsulot` (ID), `olchov_birligi` (ID)."""
+    form = QoldiqlarApiForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"xatolar": form.errors}, status=400)
+
+    def malumot():
+        balanslar = MahsulotBalans.objects.order_by("mahsulot_nomi__mahsulot_nomi")
+        if form.cleaned_data["mahsulot"]:
+            balanslar = balanslar.filter(mahsulot_nomi_id=form.cleaned_data["mahsulot"])
+        if form.cleaned_data["olchov_birligi"]:
+            balanslar = balanslar.filter(mahsulot_nomi__olchov_birligi_id=form.cleaned_data["olchov_birligi"])
+        return {"qoldiqlar": list(balanslar.values(
+            mahsulot_id=F("mahsulot_nomi_id"),
+            mahsulot=F("mahsulot_nomi__mahsulot_nomi"),
+            olchov_birligi_id=F("mahsulot_nomi__olchov_birligi_id"),
+            olchov_birligi=F("mahsulot_nomi__olchov_birligi__olchov_birligi"),
+            miqdor=F("qoldiq"),
+        ))}
+
+    oxirgi_id = KirdiChiqdi.objects.aggregate(oxirgi=Max("id"))["oxirgi"]
+    return api_javobi(request, api_etag(request, oxirgi_id), malumot)
+
+
+def harakatlar_api_view(request, pk):
+    """
+    Mahsulot harakatlari, yangilaridan boshlab. Parametrlar: `soni` (ko'pi bilan 500),
+    `oldin` (shu ID dan oldingi harakatlar; javobdagi `keyingi` qiymati).
+    """
+    mahsulot = get_object_or_404(Mahsulot.objects.select_related("olchov_birligi"), pk=pk)
+    form = HarakatlarApiForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"xatolar": form.errors}, status=400)
+
+    def malumot():
+        soni = form.cleaned_data["soni"] or HARAKATLAR_SONI
+        harakatlar = KirdiChiqdi.objects.filter(mahsulot_nomi=mahsulot).order_by("-id")
+        if form.cleaned_data["oldin"]:
+            harakatlar = harakatlar.filter(id__lt=form.cleaned_data["oldin"])
+        harakatlar = list(harakatlar.values(
+            "id", "miqdor", "summa", "sana", "amaliyot_turi", "kimga", "qayerga")[:soni + 1])
+        return {
+            "mahsulot": {"id": mahsulot.pk, "nomi": mahsulot.mahsulot_nomi,
+                         "olchov_birligi": mahsulot.olchov_birligi.olchov_birligi,
+                         "qoldiq": MahsulotBalans.objects.filter(mahsulot_nomi=mahsulot)
+                                   .values_list("qoldiq", flat=True).first() or 0},
+            "harakatlar": harakatlar[:soni],
+            "keyingi": harakatlar[soni - 1]["id"] if len(harakatlar) > soni else None,
+        }
+
+    oxirgi_id = KirdiChiqdi.objects.filter(mahsulot_nomi=mahsulot).aggregate(oxirgi=Max("id"))["oxirgi"]
+    return api_javobi(request, api_etag(request, oxirgi_id), malumot)
 
 
 # from django.contrib import messages
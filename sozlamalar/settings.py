@@ -22,6 +22,44 @@ ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=[])
 DATABASES = {
     'default': env.db("DATABASE_URL", default=f"sqlite:///{BASE_DIR}/db.sqlite3")
 }
+# SQLite test bazasi xotirada emas, faylda yaratiladi: parallel yozuv testlari
+# har bir oqim uchun alohida ulanish ochadi
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('TEST', {}).setdefault('NAME', str(BASE_DIR / 'test_db.sqlite3'))
+    # SQLite ishlab chiqarish rejimi, doimiy ulanishlar: har so'rovda ulanish va PRAGMA lar qayta o'rnatilmaydi.
+    # Boshqa bazalar uchun ulanish sozlamalari DATABASE_URL dan olinadi.
+    DATABASES['default']['CONN_MAX_AGE'] = env.int("CONN_MAX_AGE", default=60)
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# O'qish replikasi (ixtiyoriy): changelistlar, eksport va hisobotlar shu bazadan o'qiydi (ombor/replika.py).
+# Harakat yozish, balans tekshiruvi va import asosiy bazada qoladi.
+if env("REPLICA_DATABASE_URL", default=""):
+    DATABASES['replica'] = env.db("REPLICA_DATABASE_URL")
+    # Testlarda alohida replika bazasi yaratilmaydi
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['ombor.replika.ReplikaRouter']
+# Yozgan foydalanuvchi shuncha soniya asosiy bazadan o'qiydi (replika kechikishidan katta bo'lishi kerak)
+REPLIKA_KECHIKISHI = env.int("REPLIKA_KECHIKISHI", default=10)
+
+# SQLite ishlab chiqarish rejimi: har bir yangi ulanishda bajariladigan PRAGMA lar (ombor/signals.py).
+# WAL o'qishlarni yozuvdan to'smaydi, busy_timeout (ms) davomida band baza kutiladi.
+SQLITE_PRAGMALAR = {
+    'journal_mode': env("SQLITE_JOURNAL_MODE", default="WAL"),
+    'synchronous': env("SQLITE_SYNCHRONOUS", default="NORMAL"),
+    'busy_timeout': env.int("SQLITE_BUSY_TIMEOUT", default=5000),
+    'mmap_size': env.int("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024),
+    'cache_size': env.int("SQLITE_CACHE_SIZE", default=-64000),  # Manfiy qiymat: KiB (64 MB)
+}
+# "database is locked" bilan tugagan harakat yozuvi necha marta qaytadan urinib ko'riladi. Har bir urinish
+# busy_timeout gacha kutishi mumkin: eng yomon holatda so'rov (1 + urinishlar) * busy_timeout = 15 s kutadi
+SQLITE_QAYTA_URINISHLAR = env.int("SQLITE_QAYTA_URINISHLAR", default=2)
+
+# Cache: joriy qoldiqlar, API javoblari va boshqa keshlar. Bir nechta jarayon (gunicorn worker)
+# ishlaganda umumiy kesh kerak, masalan CACHE_URL=pymemcache://127.0.0.1:11211 yoki
+# CACHE_URL=filecache:///var/tmp/ombor-kesh
+CACHES = {
+    'default': env.cache("CACHE_URL", default="locmemcache://")
+}
 # Application definition
 
 INSTALLED_APPS = [
@@ -49,6 +87,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_otp.middleware.OTPMiddleware',
 ]
+# So'rovlar o'lchovi (ixtiyoriy): SQL soni va vaqti, Server-Timing sarlavhasi, xodimlar uchun admin
+# sahifasidagi panel. Eng tashqi middleware: boshqa middleware'lar so'rovlari ham hisobga olinadi.
+if env.bool("SOROV_OLCHOVI", default=False):
+    MIDDLEWARE.insert(0, 'ombor.middleware.SorovOlchoviMiddleware')
+# Shundan (soniya) sekin so'rovlar `ombor.sorovlar` logiga yoziladi
+SEKIN_SOROV_CHEGARASI = env.float("SEKIN_SOROV_CHEGARASI", default=1.0)
 
 ROOT_URLCONF = 'sozlamalar.urls'
 